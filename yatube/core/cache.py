@@ -0,0 +1,184 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import connections
+from django.test import RequestFactory
+from django.utils.cache import (cc_delim_re, get_cache_key, has_vary_header,
+                                learn_cache_key, patch_response_headers,
+                                patch_vary_headers)
+
+from .pagecache import namespaced_key
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def revalidation_executor():
+    """Пул потоков для фонового обновления устаревших страниц."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            settings.CACHE_REVALIDATE_WORKERS,
+            thread_name_prefix='cache-revalidate',
+        )
+    return _executor
+
+
+def should_store(request, response):
+    """Те же условия, что у UpdateCacheMiddleware."""
+    if response.streaming or response.status_code != 200:
+        return False
+    if (
+        not request.COOKIES and response.cookies
+        and has_vary_header(response, 'Cookie')
+    ):
+        return False
+    return 'private' not in response.get('Cache-Control', '')
+
+
+def anonymous_request(request):
+    """
+    Копия GET-запроса для фонового обновления: тот же адрес и заголовки,
+    но без cookies и с анонимным пользователем, чтобы представление
+    не трогало сессию и данные живого запроса из другого потока.
+    """
+    headers = {
+        name: value for name, value in request.META.items()
+        if name.startswith('HTTP_')
+        and name not in ('HTTP_COOKIE', 'HTTP_AUTHORIZATION')
+    }
+    copy = RequestFactory().get(
+        request.get_full_path(), secure=request.is_secure(), **headers
+    )
+    copy.user = AnonymousUser()
+    copy.resolver_match = request.resolver_match
+    return copy
+
+
+class StalePageCache:
+    """Кэш ответов представления с мягким и жёстким сроком."""
+
+    def __init__(self, view_func, soft_timeout, hard_timeout, key_prefix,
+                 cache_alias, background, lock_timeout, namespaces):
+        self.view_func = view_func
+        self.soft_timeout = soft_timeout
+        self.hard_timeout = hard_timeout
+        self.key_prefix = key_prefix
+        self.cache_alias = cache_alias
+        self.background = background
+        self.lock_timeout = lock_timeout
+        self.namespaces = namespaces
+
+    @property
+    def cache(self):
+        # Клиенты кэша у каждого потока свои.
+        return caches[self.cache_alias]
+
+    def generation(self, kwargs):
+        """Поколения пространств имён страницы одной строкой."""
+        if self.namespaces is None:
+            return ''
+        return namespaced_key(self.namespaces(**kwargs), '')
+
+    def store(self, request, response, key, generation):
+        if should_store(request, response):
+            patch_response_headers(response, self.soft_timeout)
+            self.cache.set(
+                key,
+                (response, time.time() + self.soft_timeout, generation),
+                self.hard_timeout,
+            )
+
+    def regenerate(self, request, args, kwargs, generation, lock_key=None):
+        try:
+            response = self.view_func(request, *args, **kwargs)
+            if should_store(request, response):
+                key = learn_cache_key(
+                    request, response, self.hard_timeout, self.key_prefix,
+                    self.cache,
+                )
+                self.store(request, response, key, generation)
+            return response
+        finally:
+            if lock_key is not None:
+                self.cache.delete(lock_key)
+
+    def regenerate_in_background(self, request, args, kwargs, key, lock_key,
+                                 generation, vary):
+        """
+        Обновляет копию по ключу key запросом anonymous_request. Список
+        заголовков Vary не переучивается: у копии запроса нет сессии,
+        и её Vary берётся у устаревшей копии.
+        """
+        try:
+            response = self.view_func(request, *args, **kwargs)
+            patch_vary_headers(response, vary)
+            self.store(request, response, key, generation)
+        except Exception:
+            logger.exception('Cache revalidation failed: %s', request.path)
+        finally:
+            self.cache.delete(lock_key)
+            connections.close_all()
+
+    def __call__(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return self.view_func(request, *args, **kwargs)
+        # Поколение читается до рендера: если его сдвинут во время
+        # рендера, копия сразу окажется устаревшей.
+        generation = self.generation(kwargs)
+        key = get_cache_key(request, self.key_prefix, 'GET', self.cache)
+        entry = self.cache.get(key) if key else None
+        if entry is None:
+            return self.regenerate(request, args, kwargs, generation)
+        response, fresh_until, entry_generation = entry
+        if entry_generation == generation and time.time() < fresh_until:
+            return response
+        # Копия прошлого поколения — такая же устаревшая копия: её
+        # получают все, кроме одного запроса, взявшего блокировку.
+        lock_key = f'{key}.lock'
+        if not self.cache.add(lock_key, 1, self.lock_timeout):
+            return response
+        # В фоне обновляются только копии для запросов без cookies:
+        # их получают все анонимные посетители, а не один пользователь.
+        if self.background and not request.COOKIES:
+            vary = cc_delim_re.split(response.get('Vary', ''))
+            revalidation_executor().submit(
+                self.regenerate_in_background, anonymous_request(request),
+                args, kwargs, key, lock_key, generation,
+                [v for v in vary if v],
+            )
+            return response
+        return self.regenerate(request, args, kwargs, generation, lock_key)
+
+
+def cache_page_stale(soft_timeout, hard_timeout, key_prefix='',
+                     cache_alias='default', background=False,
+                     lock_timeout=10, namespaces=None):
+    """
+    Как cache_page, но с двумя сроками. До soft_timeout страница
+    свежая, затем до hard_timeout устаревшая: её обновляет один запрос,
+    взявший блокировку в кэше, а остальные получают устаревшую копию
+    и не бьют в БД одновременно. С background копию для запросов без
+    cookies обновляет пул потоков от имени анонимного посетителя,
+    и устаревшую копию получает и сам этот запрос.
+    namespaces(**kwargs) — пространства имён страницы: их поколения
+    хранятся вместе с копией, и после bump() копия считается
+    устаревшей, как после soft_timeout.
+    """
+    def decorator(view_func):
+        cached = StalePageCache(
+            view_func, soft_timeout, hard_timeout, key_prefix,
+            cache_alias, background, lock_timeout, namespaces,
+        )
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return cached(request, *args, **kwargs)
+        return wrapper
+    return decorator
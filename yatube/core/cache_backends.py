@@ -0,0 +1,236 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Локальные уровни, блокировки и счётчики общие для всех потоков
+# процесса, как хранилища LocMemCache.
+_local_tiers = {}
+_locks = {}
+_stats = {}
+
+
+def new_stamp():
+    return uuid.uuid4().hex[:16]
+
+
+class TwoTierCache(BaseCache):
+    """
+    Кэш из двух уровней: ограниченный LRU в памяти процесса перед общим
+    кэшем OPTIONS['SHARED'].
+
+    Рядом с каждым значением в общем кэше лежит штамп версии, который
+    меняется при каждой записи. Локальная копия считается свежей
+    LOCAL_TIMEOUT секунд, после чего сверяется со штампом: если его
+    не меняли, копия продлевается без чтения значения, иначе значение
+    читается заново. Так запись в одном процессе доходит до остальных
+    не позже чем через LOCAL_TIMEOUT.
+
+    Атомарные операции (add, incr) выполняет общий уровень.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 2)
+        name = location or self.shared_alias
+        self.local = _local_tiers.setdefault(name, OrderedDict())
+        self.lock = _locks.setdefault(name, threading.Lock())
+        self.counters = _stats.setdefault(name, Counter())
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    @staticmethod
+    def stamp_key(key):
+        return f'{key}:stamp'
+
+    def local_expiry(self, timeout=DEFAULT_TIMEOUT):
+        expiry = time.time() + self.local_timeout
+        backend_expiry = self.get_backend_timeout(timeout)
+        if backend_expiry is None:
+            return expiry
+        return min(expiry, backend_expiry)
+
+    def store_local(self, local_key, value, stamp, timeout=DEFAULT_TIMEOUT):
+        # Значение хранится в pickle, чтобы вызывающий код не менял
+        # общую для потоков копию.
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.local[local_key] = (
+                pickled, self.local_expiry(timeout), stamp
+            )
+            self.local.move_to_end(local_key)
+            while len(self.local) > self.local_max_entries:
+                self.local.popitem(last=False)
+
+    def drop_local(self, local_key):
+        with self.lock:
+            self.local.pop(local_key, None)
+
+    def get_local(self, key, version):
+        """
+        Запись локального уровня (pickle, срок, штамп) или None,
+        если её там нет.
+        """
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        with self.lock:
+            entry = self.local.get(local_key)
+            if entry is not None:
+                self.local.move_to_end(local_key)
+        return entry
+
+    def revalidate_local(self, entries, version):
+        """
+        Сверяет штампы просроченных локальных записей entries одним
+        запросом к общему уровню. Возвращает значения записей, штамп
+        которых не меняли; остальные удаляются из локального уровня.
+        """
+        current = self.shared.get_many(
+            [self.stamp_key(key) for key in entries], version=version
+        )
+        valid = {}
+        for key, (pickled, _, stamp) in entries.items():
+            local_key = self.make_key(key, version=version)
+            if stamp is None or current.get(self.stamp_key(key)) != stamp:
+                self.drop_local(local_key)
+                continue
+            self.counters['local_revalidated'] += 1
+            with self.lock:
+                if local_key in self.local:
+                    self.local[local_key] = (
+                        pickled, self.local_expiry(), stamp
+                    )
+            valid[key] = pickled
+        return valid
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        found, expired, missing = {}, {}, []
+        now = time.time()
+        for key in keys:
+            entry = self.get_local(key, version)
+            if entry is None:
+                missing.append(key)
+            elif now < entry[1]:
+                self.counters['local_hits'] += 1
+                found[key] = pickle.loads(entry[0])
+            else:
+                expired[key] = entry
+        if expired:
+            valid = self.revalidate_local(expired, version)
+            for key in expired:
+                if key in valid:
+                    found[key] = pickle.loads(valid[key])
+                else:
+                    missing.append(key)
+        if not missing:
+            return found
+        self.counters['local_misses'] += len(missing)
+        shared = self.shared.get_many(
+            missing + [self.stamp_key(key) for key in missing],
+            version=version,
+        )
+        for key in missing:
+            if key not in shared:
+                self.counters['shared_misses'] += 1
+                continue
+            self.counters['shared_hits'] += 1
+            found[key] = shared[key]
+            self.store_local(
+                self.make_key(key, version=version),
+                shared[key],
+                shared.get(self.stamp_key(key)),
+            )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        stamps = {self.stamp_key(key): new_stamp() for key in data}
+        failed = self.shared.set_many(
+            {**data, **stamps}, timeout, version=version
+        )
+        for key, value in data.items():
+            self.store_local(
+                self.make_key(key, version=version),
+                value,
+                stamps[self.stamp_key(key)],
+                timeout,
+            )
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self.shared.set(
+            self.stamp_key(key), new_stamp(), timeout, version=version
+        )
+        self.drop_local(self.make_key(key, version=version))
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        # Срок значения здесь неизвестен: штамп не должен истечь
+        # раньше него, иначе локальные копии перестанут продлеваться.
+        self.shared.set(
+            self.stamp_key(key), new_stamp(), None, version=version
+        )
+        self.drop_local(self.make_key(key, version=version))
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.drop_local(self.make_key(key, version=version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.shared.delete_many(
+            [key, self.stamp_key(key)], version=version
+        )
+        self.drop_local(self.make_key(key, version=version))
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def clear(self):
+        self.shared.clear()
+        with self.lock:
+            self.local.clear()
+
+    def stats(self):
+        """Счётчики и доля попаданий каждого уровня в этом процессе."""
+        counters = dict(self.counters)
+        local_hits = (
+            counters.get('local_hits', 0)
+            + counters.get('local_revalidated', 0)
+        )
+        local_total = local_hits + counters.get('local_misses', 0)
+        shared_hits = counters.get('shared_hits', 0)
+        shared_total = shared_hits + counters.get('shared_misses', 0)
+        counters.update(
+            local_entries=len(self.local),
+            local_hit_ratio=local_hits / local_total if local_total else 0,
+            shared_hit_ratio=(
+                shared_hits / shared_total if shared_total else 0
+            ),
+        )
+        return counters
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def get_sqlite_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """Выполняет PRAGMA на переданном курсоре SQLite."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def setup_sqlite_connection(sender, connection, **kwargs):
+    """Применяет профиль SQLite к каждому новому соединению."""
+    if connection.vendor != 'sqlite':
+        return
+    cursor = connection.connection.cursor()
+    try:
+        apply_sqlite_pragmas(cursor, get_sqlite_pragmas())
+    finally:
+        cursor.close()
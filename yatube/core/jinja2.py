@@ -0,0 +1,117 @@
+import logging
+import os
+import stat
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.template import defaultfilters
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment, FileSystemBytecodeCache
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from core.templatetags.user_filters import addclass
+from posts.excerpts import CHAR_IN_POST
+from posts.templatetags.post_cards import PostListRenderer
+from posts.thumbnails import CARD_GEOMETRY, CARD_OPTIONS
+
+logger = logging.getLogger(__name__)
+
+
+def url(name, *args):
+    return reverse(name, args=args)
+
+
+def date(value, arg=None):
+    """Фильтр date Django с переводом в текущий часовой пояс."""
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def linebreaks(value):
+    return defaultfilters.linebreaks_filter(
+        value, autoescape=not hasattr(value, '__html__')
+    )
+
+
+def linebreaksbr(value):
+    return defaultfilters.linebreaksbr(
+        value, autoescape=not hasattr(value, '__html__')
+    )
+
+
+def post_cards(request):
+    """Рендерер карточек постов, как у тега post_card, на одну страницу."""
+    match = getattr(request, 'resolver_match', None)
+    return PostListRenderer(match.view_name if match else '')
+
+
+def thumbnail(image, geometry, **options):
+    """
+    Миниатюра, как у тега {% thumbnail %}: None для пустой
+    картинки или при ошибке, если не включён THUMBNAIL_DEBUG.
+    """
+    if not image:
+        return None
+    try:
+        return get_thumbnail(image, geometry, **options)
+    except Exception:
+        if thumbnail_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Thumbnail failed for %s', image)
+        return None
+
+
+def private_directory(path):
+    """
+    Создаёт каталог, доступный только текущему пользователю, или
+    проверяет существующий: из чужого каталога Jinja2 загрузила бы
+    подложенный байт-код.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise ImproperlyConfigured(
+            f'JINJA2_BYTECODE_CACHE_DIR {path} must be a directory owned '
+            f'by the current user with mode 0700.'
+        )
+    return path
+
+
+def bytecode_cache():
+    cache_dir = settings.JINJA2_BYTECODE_CACHE_DIR
+    if cache_dir:
+        return FileSystemBytecodeCache(private_directory(cache_dir))
+    return FileSystemBytecodeCache()
+
+
+def environment(**options):
+    """
+    Окружение Jinja2 для шаблонов из каталога jinja2: те же фильтры,
+    что у шаблонов Django, и кэш скомпилированного байт-кода на диске.
+    """
+    if settings.JINJA2_BYTECODE_CACHE and 'bytecode_cache' not in options:
+        options['bytecode_cache'] = bytecode_cache()
+    env = Environment(**options)
+    env.globals.update(
+        url=url,
+        post_cards=post_cards,
+        static=staticfiles_storage.url,
+        char_in_post=CHAR_IN_POST,
+        card_geometry=CARD_GEOMETRY,
+        card_options=CARD_OPTIONS,
+    )
+    env.filters.update(
+        addclass=addclass,
+        truncatechars=defaultfilters.truncatechars,
+        linebreaks=linebreaks,
+        linebreaksbr=linebreaksbr,
+        date=date,
+        thumbnail=thumbnail,
+    )
+    return env
@@ -0,0 +1,138 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Обслуживание SQLite: обновление статистики планировщика, '
+        'инкрементальный VACUUM порциями, checkpoint WAL и отчёт '
+        'о размерах таблиц и индексов. Безопасно запускать на работающем '
+        'сайте: каждая операция идёт короткой транзакцией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Полный ANALYZE вместо PRAGMA optimize.'
+        )
+        parser.add_argument(
+            '--analysis-limit', type=int, default=1000,
+            help='Ограничение числа строк, читаемых ANALYZE на индекс.'
+        )
+        parser.add_argument(
+            '--vacuum-pages', type=int, default=256,
+            help='Сколько страниц освобождать за одну порцию.'
+        )
+        parser.add_argument(
+            '--vacuum-seconds', type=float, default=5.0,
+            help='Общий бюджет времени на инкрементальный VACUUM.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между порциями, чтобы пропустить запросы сайта.'
+        )
+        parser.add_argument(
+            '--checkpoint', default='PASSIVE',
+            choices=('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'),
+        )
+        parser.add_argument(
+            '--skip-report', action='store_true',
+            help='Не выводить отчёт о размерах.'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('db_maintain поддерживает только SQLite.')
+        with connection.cursor() as cursor:
+            self.analyze(cursor, options)
+            self.vacuum(cursor, options)
+            self.checkpoint(cursor, options['checkpoint'])
+            if not options['skip_report']:
+                self.report(cursor)
+
+    def pragma(self, cursor, statement):
+        cursor.execute(f'PRAGMA {statement}')
+        return cursor.fetchone()
+
+    def analyze(self, cursor, options):
+        started = time.monotonic()
+        self.pragma(cursor, f'analysis_limit = {options["analysis_limit"]}')
+        if options['analyze']:
+            cursor.execute('ANALYZE')
+        else:
+            self.pragma(cursor, 'optimize')
+        self.stdout.write(
+            f'Статистика обновлена за {time.monotonic() - started:.2f} с'
+        )
+
+    def vacuum(self, cursor, options):
+        auto_vacuum = self.pragma(cursor, 'auto_vacuum')[0]
+        free_pages = self.pragma(cursor, 'freelist_count')[0]
+        if auto_vacuum != 2:
+            self.stdout.write(
+                f'auto_vacuum не INCREMENTAL, свободных страниц: '
+                f'{free_pages}. Для включения нужен разовый полный VACUUM '
+                f'в окно обслуживания.'
+            )
+            return
+        deadline = time.monotonic() + options['vacuum_seconds']
+        freed = 0
+        while free_pages and time.monotonic() < deadline:
+            cursor.execute(
+                f'PRAGMA incremental_vacuum({options["vacuum_pages"]})'
+            )
+            cursor.fetchall()
+            remaining = self.pragma(cursor, 'freelist_count')[0]
+            freed += free_pages - remaining
+            free_pages = remaining
+            time.sleep(options['pause'])
+        self.stdout.write(
+            f'Освобождено страниц: {freed}, осталось свободных: {free_pages}'
+        )
+
+    def checkpoint(self, cursor, mode):
+        journal_mode = self.pragma(cursor, 'journal_mode')[0]
+        if journal_mode.lower() != 'wal':
+            self.stdout.write(
+                f'Checkpoint пропущен: journal_mode={journal_mode}'
+            )
+            return
+        busy, log, checkpointed = self.pragma(
+            cursor, f'wal_checkpoint({mode})'
+        )
+        self.stdout.write(
+            f'Checkpoint {mode}: busy={busy} log={log} '
+            f'checkpointed={checkpointed}'
+        )
+
+    def report(self, cursor):
+        cursor.execute(
+            "SELECT name, type FROM sqlite_master "
+            "WHERE type IN ('table', 'index') ORDER BY tbl_name, type DESC"
+        )
+        objects = cursor.fetchall()
+        try:
+            cursor.execute(
+                'SELECT name, SUM(pgsize) FROM dbstat GROUP BY name'
+            )
+            sizes = dict(cursor.fetchall())
+        except DatabaseError:
+            sizes = {}
+        page_size = self.pragma(cursor, 'page_size')[0]
+        page_count = self.pragma(cursor, 'page_count')[0]
+        self.stdout.write(
+            f'Размер базы: {page_size * page_count // 1024} КБ'
+        )
+        self.stdout.write(f'{"объект":<60} {"тип":<6} {"строк":>9} {"КБ":>9}')
+        for name, kind in objects:
+            rows = ''
+            if kind == 'table':
+                cursor.execute(f'SELECT count(*) FROM "{name}"')
+                rows = cursor.fetchone()[0]
+            size = sizes.get(name)
+            size = '?' if size is None else size // 1024
+            self.stdout.write(f'{name:<60} {kind:<6} {rows:>9} {size:>9}')
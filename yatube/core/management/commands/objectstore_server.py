@@ -0,0 +1,37 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.objectstore import ObjectStoreServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает локальную замену S3-совместимого хранилища, '
+        'которая хранит объекты в каталоге. Только для разработки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--root', default=os.path.join(settings.BASE_DIR, 'objectstore'),
+            help='Каталог с объектами.'
+        )
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=9000)
+
+    def handle(self, *args, **options):
+        server = ObjectStoreServer(
+            options['root'], (options['host'], options['port'])
+        )
+        bucket = os.path.join(
+            options['root'], settings.OBJECT_STORAGE['BUCKET']
+        )
+        os.makedirs(bucket, exist_ok=True)
+        self.stdout.write(f'Хранилище {options["root"]} на {server.url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
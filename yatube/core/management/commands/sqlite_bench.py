@@ -0,0 +1,119 @@
+import math
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.db import apply_sqlite_pragmas, get_sqlite_pragmas
+
+
+def run_benchmark(path, pragmas, duration, readers, hold):
+    """
+    Один писатель держит транзакцию записи, читатели параллельно
+    выполняют SELECT. Возвращает задержки чтения и число ошибок.
+    """
+    setup = sqlite3.connect(path)
+    apply_sqlite_pragmas(setup, pragmas)
+    setup.execute(
+        'CREATE TABLE IF NOT EXISTS bench (id INTEGER PRIMARY KEY, text TEXT)'
+    )
+    setup.executemany(
+        'INSERT INTO bench (text) VALUES (?)',
+        (('x' * 100,) for _ in range(1000))
+    )
+    setup.commit()
+    setup.close()
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def connect(timeout):
+        conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None,
+            check_same_thread=False
+        )
+        apply_sqlite_pragmas(conn, pragmas)
+        return conn
+
+    def writer(conn):
+        while time.monotonic() < stop:
+            conn.execute('BEGIN EXCLUSIVE')
+            conn.execute('INSERT INTO bench (text) VALUES (?)', ('y' * 100,))
+            time.sleep(hold)
+            conn.execute('COMMIT')
+        conn.close()
+
+    def reader(conn):
+        while time.monotonic() < stop:
+            started = time.monotonic()
+            try:
+                conn.execute('SELECT count(*) FROM bench').fetchone()
+            except sqlite3.OperationalError:
+                with lock:
+                    errors.append(1)
+                continue
+            with lock:
+                latencies.append(time.monotonic() - started)
+        conn.close()
+
+    # Соединения открываются заранее, чтобы PRAGMA не конкурировали
+    # с уже идущей записью.
+    threads = [threading.Thread(target=writer, args=(connect(30),))]
+    threads += [
+        threading.Thread(target=reader, args=(connect(hold * 2),))
+        for _ in range(readers)
+    ]
+    stop = time.monotonic() + duration
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(errors)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку чтения SQLite при конкурентной записи '
+        'с настройками по умолчанию и с профилем SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=3.0)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument(
+            '--hold', type=float, default=0.05,
+            help='Сколько секунд писатель держит транзакцию.'
+        )
+
+    def handle(self, *args, **options):
+        profiles = (
+            ('default', {'journal_mode': 'DELETE'}),
+            ('production', get_sqlite_pragmas()),
+        )
+        for name, pragmas in profiles:
+            with tempfile.TemporaryDirectory() as tmp:
+                latencies, errors = run_benchmark(
+                    os.path.join(tmp, 'bench.sqlite3'),
+                    pragmas,
+                    options['duration'],
+                    options['readers'],
+                    options['hold'],
+                )
+            if latencies:
+                latencies.sort()
+                p99 = latencies[
+                    max(0, math.ceil(len(latencies) * 0.99) - 1)
+                ]
+                self.stdout.write(
+                    f'{name}: reads={len(latencies)} errors={errors} '
+                    f'median={statistics.median(latencies) * 1000:.2f}ms '
+                    f'p99={p99 * 1000:.2f}ms '
+                    f'max={latencies[-1] * 1000:.2f}ms'
+                )
+            else:
+                self.stdout.write(f'{name}: reads=0 errors={errors}')
@@ -0,0 +1,225 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from .middleware import query_deadline
+from .staticfiles import CompressedManifestStaticFilesStorage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class RangeFile:
+    """Файл, из которого можно прочитать не больше length байтов."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном. Возвращает
+    (start, end) включительно, None — если заголовок не подходит,
+    и False — если диапазон невыполним.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def if_range_passes(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def sendfile_response(path, name):
+    """Ответ, который отдаст файл сам фронтенд-сервер."""
+    response = HttpResponse()
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header == 'X-Accel-Redirect':
+        response[header] = settings.MEDIA_ACCEL_PREFIX + name
+    else:
+        response[header] = path
+    # Тип файла определит фронтенд-сервер.
+    del response['Content-Type']
+    return response
+
+
+def existing_file(root, path):
+    """Полный путь к файлу path внутри root или Http404."""
+    try:
+        full_path = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def file_etag(stat):
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+@query_deadline(None)
+@require_safe
+def serve_media(request, path):
+    """
+    Отдаёт файлы из MEDIA_ROOT с поддержкой ETag, Last-Modified
+    и Range. Если настроен MEDIA_SENDFILE_HEADER, передача файла
+    поручается фронтенд-серверу.
+    """
+    full_path = existing_file(settings.MEDIA_ROOT, path)
+    stat = os.stat(full_path)
+    etag = file_etag(stat)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        response = build_media_response(request, full_path, path, stat, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if path.startswith(thumbnail_settings.THUMBNAIL_PREFIX):
+        # Имена миниатюр зависят от содержимого и не меняются.
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE
+        )
+    return response
+
+
+@query_deadline(None)
+@require_safe
+def serve_static(request, path):
+    """
+    Отдаёт собранную статику из STATIC_ROOT. Сжатый заранее вариант
+    выбирается по Accept-Encoding; файлы с хешем в имени браузер
+    кэширует навсегда и больше не запрашивает.
+    """
+    full_path = existing_file(settings.STATIC_ROOT, path)
+    encoding = None
+    manifest = isinstance(
+        staticfiles_storage, CompressedManifestStaticFilesStorage
+    )
+    if manifest:
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for coding, variant in staticfiles_storage.variants(path):
+            if coding in accepted:
+                encoding, full_path = coding, variant
+                break
+    stat = os.stat(full_path)
+    etag = file_etag(stat)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            open(full_path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if manifest and staticfiles_storage.is_hashed(path):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def build_media_response(request, full_path, name, stat, etag):
+    if settings.MEDIA_SENDFILE_HEADER:
+        return sendfile_response(full_path, name)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    size = stat.st_size
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_passes(
+        request, etag, stat.st_mtime
+    ):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        # FileResponse с настоящим файлом WSGI-сервер может отдать
+        # через wsgi.file_wrapper и sendfile без копирования в воркер.
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type
+        )
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(open(full_path, 'rb'), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        size = end - start + 1
+    response['Content-Length'] = size
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
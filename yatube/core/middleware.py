@@ -0,0 +1,160 @@
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+
+from .pagecache import page_cache, page_key, view_namespaces
+from .views import service_unavailable
+
+logger = logging.getLogger(__name__)
+
+# Сколько запросов каждого представления этого процесса было прервано
+# по дедлайну; персоналу отдаётся по адресу /deadline-stats/.
+deadline_stats = Counter()
+
+
+def query_deadline(seconds):
+    """Задаёт представлению собственный дедлайн запросов к БД."""
+    def decorator(view_func):
+        view_func.query_deadline = seconds
+        return view_func
+    return decorator
+
+
+class QueryDeadlineMiddleware:
+    """
+    Прерывает запросы SQLite, которые выполняются дольше дедлайна
+    представления, через progress handler, и отвечает 503.
+    Потоковые ответы читают БД уже после возврата из представления:
+    handler снимается, когда их содержимое прочитано, а прерванный
+    по дедлайну поток обрывается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.clear_handler()
+            raise
+        if (
+            response.streaming
+            and getattr(request, 'query_deadline', None) is not None
+        ):
+            response.streaming_content = self.stream_with_deadline(
+                request, response.streaming_content
+            )
+        else:
+            self.clear_handler()
+        return response
+
+    def stream_with_deadline(self, request, content):
+        try:
+            yield from content
+        except OperationalError:
+            if time.monotonic() <= request.query_deadline:
+                raise
+            self.deadline_exceeded(request)
+        finally:
+            self.clear_handler()
+
+    def clear_handler(self):
+        if connection.vendor == 'sqlite' and connection.connection:
+            connection.connection.set_progress_handler(None, 0)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        seconds = getattr(
+            view_func, 'query_deadline', settings.QUERY_DEADLINE
+        )
+        if seconds is None or connection.vendor != 'sqlite':
+            return None
+        deadline = time.monotonic() + seconds
+        request.query_deadline = deadline
+        connection.ensure_connection()
+        connection.connection.set_progress_handler(
+            lambda: time.monotonic() > deadline,
+            settings.QUERY_DEADLINE_OPCODES,
+        )
+        return None
+
+    def process_exception(self, request, exception):
+        deadline = getattr(request, 'query_deadline', None)
+        if (
+            deadline is None
+            or not isinstance(exception, OperationalError)
+            or time.monotonic() <= deadline
+        ):
+            return None
+        self.clear_handler()
+        self.deadline_exceeded(request)
+        return service_unavailable(request)
+
+    def deadline_exceeded(self, request):
+        view_name = request.resolver_match.view_name
+        deadline_stats[view_name] += 1
+        logger.warning(
+            'Query deadline exceeded in %s (%s)', view_name, request.path
+        )
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Отдаёт анонимным посетителям сохранённые страницы представлений
+    из ANONYMOUS_PAGE_CACHE_VIEWS без обращений к БД. Анонимным
+    считается запрос без cookie сессии и сообщений: такой запрос
+    не читает сессию и пользователя. В ключ входят поколения
+    пространств имён представления (core.pagecache.cache_namespaces).
+    Middleware должен стоять перед QueryDeadlineMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, 'anonymous_page_key', None)
+        if key is not None and self.can_store(request, response):
+            page_cache().set(
+                key,
+                (response.content, response['Content-Type']),
+                settings.ANONYMOUS_PAGE_CACHE_TIMEOUT,
+            )
+        return response
+
+    def is_cacheable(self, request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and 'messages' not in request.COOKIES
+            and request.resolver_match.view_name
+            in settings.ANONYMOUS_PAGE_CACHE_VIEWS
+        )
+
+    def can_store(self, request, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+            and not request.user.is_authenticated
+            and 'private' not in response.get('Cache-Control', '')
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.is_cacheable(request):
+            return None
+        cache = page_cache()
+        key = page_key(
+            request.get_full_path(), view_namespaces(view_func, view_kwargs)
+        )
+        cached = cache.get(key)
+        if cached is None:
+            request.anonymous_page_key = key
+            return None
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
@@ -0,0 +1,242 @@
+"""
+Локальная замена S3-совместимого хранилища для разработки и тестов.
+
+Объекты лежат файлами в каталоге root/<bucket>/<key>. Поддерживаются
+PUT, GET, HEAD и DELETE объектов, ListObjectsV2 и загрузка по частям.
+Подписи запросов не проверяются.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from .storage import S3_NS
+
+UPLOADS_DIR = '.uploads'
+LIST_PAGE_SIZE = 1000
+
+
+class ObjectStoreHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def parse(self):
+        parts = urlsplit(self.path)
+        bucket, _, key = unquote(parts.path).lstrip('/').partition('/')
+        query = {
+            name: values[0]
+            for name, values in parse_qs(
+                parts.query, keep_blank_values=True
+            ).items()
+        }
+        return bucket, key, query
+
+    def object_path(self, bucket, key):
+        root = os.path.realpath(self.server.root)
+        path = os.path.realpath(os.path.join(root, bucket, key))
+        if not key or bucket == UPLOADS_DIR or not path.startswith(
+            os.path.join(root, bucket, '')
+        ):
+            return None
+        return path
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def respond(self, status, body=b'', headers=None):
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if 'Content-Length' not in (headers or {}):
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def respond_xml(self, tag, content, status=HTTPStatus.OK):
+        self.respond(
+            status,
+            f'<?xml version="1.0" encoding="UTF-8"?>'
+            f'<{tag} xmlns="{S3_NS[1:-1]}">{content}</{tag}>',
+            {'Content-Type': 'application/xml'},
+        )
+
+    def not_found(self):
+        self.respond_xml(
+            'Error', '<Code>NoSuchKey</Code>', HTTPStatus.NOT_FOUND
+        )
+
+    def write_file(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+        return f'"{hashlib.md5(data).hexdigest()}"'
+
+    def upload_dir(self, upload_id):
+        return os.path.join(
+            self.server.root, UPLOADS_DIR, os.path.basename(upload_id)
+        )
+
+    def do_PUT(self):
+        bucket, key, query = self.parse()
+        data = self.read_body()
+        if 'uploadId' in query:
+            part = os.path.join(
+                self.upload_dir(query['uploadId']),
+                str(int(query['partNumber'])),
+            )
+            if not os.path.isdir(os.path.dirname(part)):
+                return self.not_found()
+            etag = self.write_file(part, data)
+            return self.respond(HTTPStatus.OK, headers={'ETag': etag})
+        path = self.object_path(bucket, key)
+        if path is None:
+            os.makedirs(os.path.join(self.server.root, bucket), exist_ok=True)
+            return self.respond(HTTPStatus.OK)
+        etag = self.write_file(path, data)
+        self.respond(HTTPStatus.OK, headers={'ETag': etag})
+
+    def do_POST(self):
+        bucket, key, query = self.parse()
+        path = self.object_path(bucket, key)
+        if path is None:
+            return self.not_found()
+        if 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            os.makedirs(self.upload_dir(upload_id))
+            return self.respond_xml(
+                'InitiateMultipartUploadResult',
+                f'<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>'
+                f'<UploadId>{upload_id}</UploadId>',
+            )
+        upload_dir = self.upload_dir(query.get('uploadId', ''))
+        if not os.path.isdir(upload_dir):
+            return self.not_found()
+        numbers = [
+            element.text for element in
+            ET.fromstring(self.read_body()).iter('PartNumber')
+        ]
+        data = b''.join(
+            open(os.path.join(upload_dir, str(int(number))), 'rb').read()
+            for number in numbers
+        )
+        etag = self.write_file(path, data)
+        shutil.rmtree(upload_dir)
+        self.respond_xml(
+            'CompleteMultipartUploadResult',
+            f'<Key>{escape(key)}</Key><ETag>{escape(etag)}</ETag>',
+        )
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        bucket, key, query = self.parse()
+        if not key:
+            return self.list_objects(bucket, query)
+        path = self.object_path(bucket, key)
+        if path is None or not os.path.isfile(path):
+            return self.not_found()
+        with open(path, 'rb') as file:
+            data = file.read()
+        stat = os.stat(path)
+        self.respond(HTTPStatus.OK, data, {
+            'Content-Length': str(stat.st_size),
+            'Content-Type': 'application/octet-stream',
+            'ETag': f'"{hashlib.md5(data).hexdigest()}"',
+            'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+        })
+
+    def do_DELETE(self):
+        bucket, key, query = self.parse()
+        if 'uploadId' in query:
+            shutil.rmtree(
+                self.upload_dir(query['uploadId']), ignore_errors=True
+            )
+            return self.respond(HTTPStatus.NO_CONTENT)
+        path = self.object_path(bucket, key)
+        if path is not None and os.path.isfile(path):
+            os.remove(path)
+        self.respond(HTTPStatus.NO_CONTENT)
+
+    def list_objects(self, bucket, query):
+        root = os.path.join(self.server.root, bucket)
+        if bucket == UPLOADS_DIR or not os.path.isdir(root):
+            return self.respond_xml(
+                'Error', '<Code>NoSuchBucket</Code>', HTTPStatus.NOT_FOUND
+            )
+        prefix = query.get('prefix', '')
+        delimiter = query.get('delimiter', '')
+        start = query.get('continuation-token', '')
+        keys = sorted(
+            os.path.relpath(os.path.join(directory, name), root)
+            .replace(os.sep, '/')
+            for directory, _, names in os.walk(root)
+            for name in names
+        )
+        contents, prefixes = [], []
+        for key in keys:
+            if not key.startswith(prefix) or key <= start:
+                continue
+            if delimiter and start.endswith(delimiter) and key.startswith(
+                start
+            ):
+                # Токен — общий префикс: его ключи уже отданы.
+                continue
+            rest = key[len(prefix):]
+            if delimiter and delimiter in rest:
+                common = prefix + rest.split(delimiter)[0] + delimiter
+                if common not in prefixes:
+                    prefixes.append(common)
+                continue
+            contents.append(key)
+        entries = sorted(
+            [(key, False) for key in contents]
+            + [(common, True) for common in prefixes]
+        )
+        page, rest = entries[:LIST_PAGE_SIZE], entries[LIST_PAGE_SIZE:]
+        body = ''.join(
+            f'<CommonPrefixes><Prefix>{escape(name)}</Prefix></CommonPrefixes>'
+            if is_prefix else f'<Contents><Key>{escape(name)}</Key></Contents>'
+            for name, is_prefix in page
+        )
+        if rest:
+            body += (
+                f'<IsTruncated>true</IsTruncated>'
+                f'<NextContinuationToken>{escape(page[-1][0])}'
+                f'</NextContinuationToken>'
+            )
+        self.respond_xml('ListBucketResult', body)
+
+
+class ObjectStoreServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, root, address=('127.0.0.1', 0)):
+        self.root = root
+        os.makedirs(os.path.join(root, UPLOADS_DIR), exist_ok=True)
+        super().__init__(address, ObjectStoreHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
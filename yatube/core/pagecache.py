@@ -0,0 +1,89 @@
+"""
+Поколения пространств имён кэша и кэш страниц для анонимных посетителей.
+
+У каждого пространства имён (общая лента, лента автора, группы и т. п.)
+есть счётчик поколения в кэше. Ключи закэшированных страниц и выборок
+включают поколения своих пространств, поэтому одно bump() делает
+устаревшими все страницы ленты, какие бы URL и номера страниц ни были
+закэшированы. Пространство SITE входит в каждый ключ: его сдвигают
+изменения, видные на всех страницах.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+SITE = 'site'
+
+
+def page_cache():
+    return caches[settings.ANONYMOUS_PAGE_CACHE_ALIAS]
+
+
+def generation_key(namespace):
+    return f'generation:{namespace}'
+
+
+def initial_generation():
+    # Не 1: если счётчик вытеснят из кэша, новое поколение
+    # не совпадёт со старым, и старые ключи не оживут.
+    return int(time.time() * 1000)
+
+
+def generations(namespaces):
+    keys = {generation_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    result = {}
+    for key, namespace in keys.items():
+        value = found.get(key)
+        if value is None:
+            value = initial_generation()
+            if not cache.add(key, value, None):
+                value = cache.get(key, value)
+        result[namespace] = value
+    return result
+
+
+def namespaced_key(namespaces, key):
+    """Ключ key с поколениями SITE и пространств namespaces."""
+    namespaces = [SITE, *namespaces]
+    found = generations(namespaces)
+    suffix = '.'.join(str(found[namespace]) for namespace in namespaces)
+    return f'{key}:{suffix}'
+
+
+def bump(*namespaces):
+    """Делает устаревшими все ключи пространств namespaces."""
+    for namespace in set(namespaces):
+        key = generation_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, initial_generation(), None)
+
+
+def invalidate_pages():
+    """Делает устаревшими все сохранённые страницы и выборки."""
+    bump(SITE)
+
+
+def cache_namespaces(func):
+    """
+    Задаёт пространства имён страниц представления: func получает
+    именованные аргументы из URL и возвращает список пространств.
+    """
+    def decorator(view_func):
+        view_func.cache_namespaces = func
+        return view_func
+    return decorator
+
+
+def view_namespaces(view_func, kwargs):
+    func = getattr(view_func, 'cache_namespaces', None)
+    return func(**kwargs) if func is not None else []
+
+
+def page_key(full_path, namespaces=()):
+    digest = hashlib.md5(full_path.encode()).hexdigest()
+    return namespaced_key(namespaces, f'anon_page:{digest}')
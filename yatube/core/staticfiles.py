@@ -0,0 +1,92 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico',
+)
+# Файлы меньше этого размера сжимать невыгодно.
+COMPRESS_MIN_SIZE = 256
+# Сжатый вариант сохраняется, только если он заметно меньше исходного.
+COMPRESS_MAX_RATIO = 0.95
+
+
+def compressors():
+    """Пары (Content-Encoding, расширение, функция сжатия)."""
+    variants = [('gzip', '.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br', brotli.compress))
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Манифест с хешами в именах файлов. После collectstatic рядом
+    с каждым хешированным текстовым файлом кладутся сжатые заранее
+    варианты .br (если установлен brotli) и .gz.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hashed_names = None
+
+    def post_process(self, *args, **kwargs):
+        self.hashed_names = None
+        yield from super().post_process(*args, **kwargs)
+        self.hashed_names = None
+        if kwargs.get('dry_run'):
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            for name in self.compress(hashed_name):
+                yield hashed_name, name, True
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return []
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return []
+        created = []
+        for _, extension, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) > len(data) * COMPRESS_MAX_RATIO:
+                continue
+            with open(path + extension, 'wb') as file:
+                file.write(compressed)
+            created.append(name + extension)
+        return created
+
+    def stored_name(self, name):
+        # Без collectstatic (разработка, тесты) ссылки ведут
+        # на исходные имена, если это явно разрешено. В бою
+        # отсутствующий или устаревший манифест — ошибка.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if settings.STATICFILES_MANIFEST_FALLBACK:
+                return name
+            raise
+
+    def is_hashed(self, name):
+        """Имя из манифеста: содержимое такого файла не меняется."""
+        if self.hashed_names is None:
+            self.hashed_names = set(self.hashed_files.values())
+        return name in self.hashed_names
+
+    def variants(self, name):
+        """Сжатые варианты файла name, которые есть на диске."""
+        path = self.path(name)
+        return [
+            (encoding, path + extension)
+            for encoding, extension, _ in compressors()
+            if os.path.isfile(path + extension)
+        ]
@@ -0,0 +1,272 @@
+import datetime
+import hashlib
+import hmac
+import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote, unquote, urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.http import parse_http_date
+
+S3_NS = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+# Файлы до этого размера при чтении держатся в памяти.
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def sign_request(method, url, headers, payload_hash, access_key,
+                 secret_key, region, service='s3', now=None):
+    """
+    Подписывает запрос AWS Signature Version 4: добавляет в headers
+    X-Amz-Date и Authorization. Подписываются все переданные заголовки.
+    """
+    now = now or datetime.datetime.utcnow()
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    date = amz_date[:8]
+    parts = urlsplit(url)
+    headers['Host'] = parts.netloc
+    headers['X-Amz-Date'] = amz_date
+    canonical_headers = sorted(
+        (name.lower(), ' '.join(str(value).split()))
+        for name, value in headers.items()
+    )
+    signed_headers = ';'.join(name for name, _ in canonical_headers)
+    query = sorted(
+        tuple(quote(unquote(part), safe='-_.~') for part in (key, value))
+        for key, _, value in (
+            item.partition('=') for item in parts.query.split('&') if item
+        )
+    )
+    canonical_request = '\n'.join((
+        method,
+        parts.path or '/',
+        '&'.join(f'{key}={value}' for key, value in query),
+        ''.join(f'{name}:{value}\n' for name, value in canonical_headers),
+        signed_headers,
+        payload_hash,
+    ))
+    scope = f'{date}/{region}/{service}/aws4_request'
+    string_to_sign = '\n'.join((
+        'AWS4-HMAC-SHA256',
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ))
+    key = _hmac(f'AWS4{secret_key}'.encode(), date)
+    for part in (region, service, 'aws4_request'):
+        key = _hmac(key, part)
+    signature = hmac.new(
+        key, string_to_sign.encode(), hashlib.sha256
+    ).hexdigest()
+    headers['Authorization'] = (
+        f'AWS4-HMAC-SHA256 Credential={access_key}/{scope}, '
+        f'SignedHeaders={signed_headers}, Signature={signature}'
+    )
+    return headers
+
+
+@deconstructible
+class ObjectStorage(Storage):
+    """
+    Хранилище файлов в S3-совместимом объектном хранилище.
+
+    Настройки берутся из OBJECT_STORAGE, ключевые аргументы
+    их переопределяют. Размер и время изменения файлов кэшируются
+    в METADATA_CACHE, поэтому exists() и size() для уже известных
+    файлов не ходят в сеть. Файлы больше MULTIPART_THRESHOLD
+    загружаются по частям в MAX_WORKERS потоков.
+    """
+
+    def __init__(self, **options):
+        config = {
+            key.lower(): value
+            for key, value in settings.OBJECT_STORAGE.items()
+        }
+        config.update(options)
+        self.endpoint_url = config['endpoint_url'].rstrip('/')
+        self.bucket = config['bucket']
+        self.access_key = config.get('access_key', '')
+        self.secret_key = config.get('secret_key', '')
+        self.region = config.get('region', 'us-east-1')
+        self.public_url = config.get('public_url') or (
+            f'{self.endpoint_url}/{self.bucket}/'
+        )
+        self.multipart_threshold = config.get(
+            'multipart_threshold', 8 * 1024 * 1024
+        )
+        self.part_size = config.get('part_size', 8 * 1024 * 1024)
+        self.max_workers = config.get('max_workers', 4)
+        self.timeout = config.get('timeout', 10)
+        self.metadata_cache = caches[config.get('metadata_cache', 'default')]
+        self.metadata_timeout = config.get('metadata_timeout', 24 * 60 * 60)
+        self.session = requests.Session()
+
+    def object_url(self, name, query=''):
+        url = f'{self.endpoint_url}/{self.bucket}/{quote(name, safe="/~")}'
+        return f'{url}?{query}' if query else url
+
+    def request(self, method, url, data=None, headers=None, ok=(200,)):
+        headers = dict(headers or {})
+        headers['X-Amz-Content-Sha256'] = UNSIGNED_PAYLOAD
+        sign_request(
+            method, url, headers, UNSIGNED_PAYLOAD,
+            self.access_key, self.secret_key, self.region,
+        )
+        response = self.session.request(
+            method, url, data=data, headers=headers, timeout=self.timeout
+        )
+        if response.status_code not in ok:
+            raise OSError(
+                f'{method} {url}: {response.status_code} {response.text}'
+            )
+        return response
+
+    def metadata_key(self, name):
+        digest = hashlib.md5(name.encode()).hexdigest()
+        return f'objectstorage:{self.bucket}:{digest}'
+
+    def remember(self, name, size, modified):
+        self.metadata_cache.set(
+            self.metadata_key(name), (size, modified), self.metadata_timeout
+        )
+
+    def metadata(self, name):
+        """(размер, время изменения) файла или None, если его нет."""
+        key = self.metadata_key(name)
+        cached = self.metadata_cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.request('HEAD', self.object_url(name), ok=(200, 404))
+        if response.status_code == 404:
+            # Отсутствие не кэшируется: файл может появиться с другого узла.
+            return None
+        size = int(response.headers['Content-Length'])
+        modified = parse_http_date(response.headers['Last-Modified'])
+        self.remember(name, size, modified)
+        return size, modified
+
+    def _open(self, name, mode='rb'):
+        response = self.request('GET', self.object_url(name), ok=(200, 404))
+        if response.status_code == 404:
+            raise FileNotFoundError(name)
+        file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        for chunk in response.iter_content(64 * 1024):
+            file.write(chunk)
+        file.seek(0)
+        return File(file, name)
+
+    def _save(self, name, content):
+        name = name.replace('\\', '/')
+        content.seek(0)
+        if content.size > self.multipart_threshold:
+            self.upload_multipart(name, content)
+        else:
+            self.request('PUT', self.object_url(name), data=content.read())
+        self.remember(name, content.size, timezone.now().timestamp())
+        return name
+
+    def upload_multipart(self, name, content):
+        """
+        Загружает content по частям PART_SIZE. В памяти одновременно
+        не больше MAX_WORKERS частей; при ошибке загрузка отменяется.
+        """
+        response = self.request('POST', self.object_url(name, 'uploads'))
+        upload_id = ET.fromstring(response.content).findtext(
+            f'{S3_NS}UploadId'
+        )
+        upload_query = f'uploadId={quote(upload_id, safe="")}'
+
+        def upload_part(number, data):
+            response = self.request(
+                'PUT',
+                self.object_url(name, f'partNumber={number}&{upload_query}'),
+                data=data,
+            )
+            return number, response.headers['ETag']
+
+        etags = {}
+        try:
+            with ThreadPoolExecutor(self.max_workers) as executor:
+                running = set()
+                number = 0
+                for data in iter(lambda: content.read(self.part_size), b''):
+                    if len(running) >= self.max_workers:
+                        done, running = wait(
+                            running, return_when=FIRST_COMPLETED
+                        )
+                        etags.update(future.result() for future in done)
+                    number += 1
+                    running.add(executor.submit(upload_part, number, data))
+                etags.update(future.result() for future in running)
+        except Exception:
+            self.request(
+                'DELETE', self.object_url(name, upload_query), ok=(204, 404)
+            )
+            raise
+        parts = ''.join(
+            f'<Part><PartNumber>{number}</PartNumber>'
+            f'<ETag>{etags[number]}</ETag></Part>'
+            for number in sorted(etags)
+        )
+        self.request(
+            'POST',
+            self.object_url(name, upload_query),
+            data=f'<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>',
+        )
+
+    def delete(self, name):
+        self.request('DELETE', self.object_url(name), ok=(204, 404))
+        self.metadata_cache.delete(self.metadata_key(name))
+
+    def exists(self, name):
+        return self.metadata(name) is not None
+
+    def size(self, name):
+        metadata = self.metadata(name)
+        if metadata is None:
+            raise FileNotFoundError(name)
+        return metadata[0]
+
+    def get_modified_time(self, name):
+        metadata = self.metadata(name)
+        if metadata is None:
+            raise FileNotFoundError(name)
+        return datetime.datetime.fromtimestamp(
+            metadata[1], datetime.timezone.utc
+        )
+
+    def listdir(self, path):
+        prefix = path.strip('/') + '/' if path.strip('/') else ''
+        directories, files = [], []
+        token = None
+        while True:
+            query = f'delimiter=%2F&list-type=2&prefix={quote(prefix, "")}'
+            if token:
+                query += f'&continuation-token={quote(token, safe="")}'
+            response = self.request(
+                'GET', f'{self.endpoint_url}/{self.bucket}?{query}'
+            )
+            root = ET.fromstring(response.content)
+            for item in root.iter(f'{S3_NS}CommonPrefixes'):
+                directories.append(
+                    item.findtext(f'{S3_NS}Prefix')[len(prefix):].rstrip('/')
+                )
+            for item in root.iter(f'{S3_NS}Contents'):
+                files.append(item.findtext(f'{S3_NS}Key')[len(prefix):])
+            token = root.findtext(f'{S3_NS}NextContinuationToken')
+            if not token:
+                return directories, files
+
+    def url(self, name):
+        return self.public_url + quote(name.replace('\\', '/'), safe='/~')
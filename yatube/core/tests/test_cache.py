@@ -0,0 +1,115 @@
+from concurrent.futures import Future
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from .. import cache as cache_module
+from ..cache import cache_page_stale
+from ..pagecache import bump
+
+
+class ImmediateExecutor:
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+class CachePageStaleTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.factory = RequestFactory()
+
+    def view(self, request):
+        self.calls += 1
+        self.last_request = request
+        return HttpResponse(f'version {self.calls}')
+
+    def get(self, view, **headers):
+        request = self.factory.get('/page/?page=2', **headers)
+        request.user = mock.sentinel.user
+        return view(request).content.decode()
+
+    def expire(self, now):
+        return mock.patch.object(cache_module.time, 'time', return_value=now)
+
+    def test_fresh_copy_served_from_cache(self):
+        view = cache_page_stale(10, 100, key_prefix='test')(self.view)
+        with self.expire(1000):
+            self.assertEqual(self.get(view), 'version 1')
+            self.assertEqual(self.get(view), 'version 1')
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_copy_regenerated_once(self):
+        """Устаревшую копию обновляет только запрос с блокировкой."""
+        view = cache_page_stale(10, 100, key_prefix='test')(self.view)
+        with self.expire(1000):
+            self.get(view)
+        lock = mock.patch.object(cache, 'add', return_value=False)
+        with self.expire(1020), lock:
+            self.assertEqual(self.get(view), 'version 1')
+        with self.expire(1020):
+            self.assertEqual(self.get(view), 'version 2')
+            self.assertEqual(self.get(view), 'version 2')
+        self.assertEqual(self.calls, 2)
+
+    def test_bumped_namespace_regenerated_once(self):
+        """
+        После bump() страницу перерисовывает один запрос с блокировкой,
+        остальные получают копию прошлого поколения.
+        """
+        view = cache_page_stale(
+            10, 100, key_prefix='test', namespaces=lambda: ['feed'],
+        )(self.view)
+        with self.expire(1000):
+            self.get(view)
+            bump('feed')
+            with mock.patch.object(cache, 'add', return_value=False):
+                self.assertEqual(self.get(view), 'version 1')
+            self.assertEqual(self.get(view), 'version 2')
+            self.assertEqual(self.get(view), 'version 2')
+        self.assertEqual(self.calls, 2)
+
+    def test_background_revalidation(self):
+        view = cache_page_stale(
+            10, 100, key_prefix='test', background=True
+        )(self.view)
+        host = {'HTTP_HOST': 'localhost'}
+        with self.expire(1000):
+            self.get(view, **host)
+        executor = mock.patch.object(
+            cache_module, 'revalidation_executor',
+            return_value=ImmediateExecutor(),
+        )
+        with self.expire(1020), executor:
+            self.assertEqual(self.get(view, **host), 'version 1')
+            self.assertEqual(self.get(view, **host), 'version 2')
+        request = self.last_request
+        self.assertTrue(request.user.is_anonymous)
+        self.assertEqual(request.get_full_path(), '/page/?page=2')
+        self.assertEqual(request.get_host(), 'localhost')
+
+    def test_request_with_cookies_revalidated_in_place(self):
+        """Копию для запроса с cookies обновляет сам запрос."""
+        view = cache_page_stale(
+            10, 100, key_prefix='test', background=True
+        )(self.view)
+        with self.expire(1000):
+            self.get(view, HTTP_COOKIE='sessionid=abc')
+        executor = mock.patch.object(cache_module, 'revalidation_executor')
+        with self.expire(1020), executor as revalidation_executor:
+            self.assertEqual(
+                self.get(view, HTTP_COOKIE='sessionid=abc'), 'version 2'
+            )
+        revalidation_executor.assert_not_called()
+        self.assertIs(self.last_request.user, mock.sentinel.user)
+
+    def test_post_not_cached(self):
+        view = cache_page_stale(10, 100, key_prefix='test')(self.view)
+        view(self.factory.post('/page/'))
+        view(self.factory.post('/page/'))
+        self.assertEqual(self.calls, 2)
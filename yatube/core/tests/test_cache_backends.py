@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import cache_backends
+from ..cache_backends import TwoTierCache
+
+User = get_user_model()
+
+
+def make_cache(name, **options):
+    options.setdefault('SHARED', 'shared')
+    options.setdefault('LOCAL_TIMEOUT', 2)
+    return TwoTierCache(f'test-{name}', {'OPTIONS': options})
+
+
+class TwoTierCacheTests(TestCase):
+
+    def setUp(self):
+        caches['shared'].clear()
+        cache_backends._local_tiers.clear()
+        cache_backends._stats.clear()
+        # Два процесса с общим вторым уровнем.
+        self.first = make_cache('first')
+        self.second = make_cache('second')
+
+    def at(self, now):
+        return mock.patch.object(cache_backends.time, 'time', return_value=now)
+
+    def test_local_tier_serves_hot_keys(self):
+        with self.at(1000):
+            self.first.set('group', {'slug': 'cats'})
+            with mock.patch.object(caches['shared'], 'get_many') as shared:
+                self.assertEqual(self.first.get('group'), {'slug': 'cats'})
+            shared.assert_not_called()
+        self.assertEqual(self.first.stats()['local_hit_ratio'], 1)
+
+    def test_write_reaches_other_process_after_local_timeout(self):
+        with self.at(1000):
+            self.first.set('group', 'old')
+            self.assertEqual(self.second.get('group'), 'old')
+            self.first.set('group', 'new')
+            self.assertEqual(self.second.get('group'), 'old')
+        with self.at(1003):
+            self.assertEqual(self.second.get('group'), 'new')
+
+    def test_unchanged_value_revalidated_by_stamp(self):
+        with self.at(1000):
+            self.first.set('group', 'value')
+            self.second.get('group')
+        with self.at(1003):
+            self.assertEqual(self.second.get('group'), 'value')
+        stats = self.second.stats()
+        self.assertEqual(stats['local_revalidated'], 1)
+        self.assertEqual(stats['shared_hits'], 1)
+
+    def test_expired_keys_revalidated_in_one_request(self):
+        """Штампы просроченных локальных копий читаются одним get_many."""
+        keys = [f'key{number}' for number in range(40)]
+        with self.at(1000):
+            self.first.set_many({key: key for key in keys})
+        shared = caches['shared']
+        with self.at(1003), mock.patch.object(
+            shared, 'get_many', wraps=shared.get_many
+        ) as get_many:
+            found = self.first.get_many(keys)
+        self.assertEqual(found, {key: key for key in keys})
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(self.first.stats()['local_revalidated'], 40)
+
+    def test_incremented_counter_keeps_local_tier(self):
+        """Штамп счётчика после incr не истекает раньше самого счётчика."""
+        with self.at(1000):
+            self.first.add('generation', 1, None)
+            self.first.incr('generation')
+            self.first.get('generation')
+        later = 1000 + self.first.default_timeout + 10
+        with self.at(later):
+            self.assertEqual(self.first.get('generation'), 2)
+        self.assertEqual(self.first.stats()['local_revalidated'], 1)
+
+    def test_delete_and_incr_propagate(self):
+        with self.at(1000):
+            self.first.set('counter', 1)
+            self.second.get('counter')
+            self.assertEqual(self.first.incr('counter'), 2)
+            self.assertEqual(self.first.get('counter'), 2)
+        with self.at(1003):
+            self.assertEqual(self.second.get('counter'), 2)
+            self.first.delete('counter')
+        with self.at(1006):
+            self.assertIsNone(self.second.get('counter'))
+
+    def test_add_is_atomic_in_shared_tier(self):
+        self.assertTrue(self.first.add('lock', 1))
+        self.assertFalse(self.second.add('lock', 1))
+
+    def test_local_tier_is_bounded(self):
+        cache = make_cache('small', LOCAL_MAX_ENTRIES=2)
+        for number in range(3):
+            cache.set(f'key{number}', number)
+        self.assertEqual(cache.stats()['local_entries'], 2)
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertEqual(cache.stats()['shared_hits'], 1)
+
+    def test_values_are_copied(self):
+        self.first.set('items', [1])
+        self.first.get('items').append(2)
+        self.assertEqual(self.first.get('items'), [1])
+
+    def test_stats_view_for_staff_only(self):
+        url = reverse('cache_stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get(url)
+        self.assertIn('local_hit_ratio', response.json()['default'])
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..db import apply_sqlite_pragmas, get_sqlite_pragmas
+
+
+class SQLiteProfileTests(TestCase):
+    def test_connection_has_busy_timeout(self):
+        """Профиль SQLite применяется к соединениям Django."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+        self.assertEqual(busy_timeout, get_sqlite_pragmas()['busy_timeout'])
+
+    def test_reader_not_blocked_by_writer(self):
+        """В режиме WAL читатель не ждёт открытую транзакцию записи."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.sqlite3')
+            writer = sqlite3.connect(path, isolation_level=None)
+            apply_sqlite_pragmas(writer, get_sqlite_pragmas())
+            writer.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+            writer.execute('INSERT INTO t DEFAULT VALUES')
+            mode = writer.execute('PRAGMA journal_mode').fetchone()[0]
+            self.assertEqual(mode, 'wal')
+
+            writer.execute('BEGIN EXCLUSIVE')
+            writer.execute('INSERT INTO t DEFAULT VALUES')
+            reader = sqlite3.connect(path, timeout=0)
+            count = reader.execute('SELECT count(*) FROM t').fetchone()[0]
+            self.assertEqual(count, 1)
+            writer.execute('COMMIT')
+            reader.close()
+            writer.close()
+
+
+class DBMaintainTests(TestCase):
+    def test_db_maintain_reports_tables(self):
+        """Команда db_maintain выводит отчёт по таблицам и индексам."""
+        out = StringIO()
+        call_command('db_maintain', vacuum_seconds=0.1, stdout=out)
+        report = out.getvalue()
+        self.assertIn('posts_post', report)
+        self.assertIn('posts_post_author_id', report)
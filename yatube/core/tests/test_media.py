@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = b'0123456789'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ServeMediaTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'))
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'a.txt'), 'wb') as f:
+            f.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    url = '/media/posts/a.txt'
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с ETag и заголовками кэширования."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_ranges(self):
+        """Диапазоны байтов отдаются с кодом 206."""
+        ranges = {
+            'bytes=2-5': (b'2345', 'bytes 2-5/10'),
+            'bytes=7-': (b'789', 'bytes 7-9/10'),
+            'bytes=-3': (b'789', 'bytes 7-9/10'),
+            'bytes=8-100': (b'89', 'bytes 8-9/10'),
+        }
+        for header, (body, content_range) in ranges.items():
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT
+                )
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(response['Content-Length'], str(len(body)))
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_if_range_mismatch_returns_full_file(self):
+        """Устаревший If-Range отменяет Range."""
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        """Передача файла фронтенд-серверу через X-Accel-Redirect."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.txt'
+        )
+        self.assertEqual(response.content, b'')
+
+    def test_path_traversal(self):
+        response = self.client.get('/media/../settings.py')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.get('/media/posts/missing.txt')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
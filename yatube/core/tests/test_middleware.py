@@ -0,0 +1,45 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..middleware import deadline_stats
+
+User = get_user_model()
+
+
+class QueryDeadlineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(QUERY_DEADLINE=None)
+    def test_no_deadline(self):
+        """Без дедлайна страница отдаётся как обычно."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(QUERY_DEADLINE=-1, QUERY_DEADLINE_OPCODES=1)
+    def test_expired_deadline_returns_503(self):
+        """Запрос, вышедший за дедлайн, прерывается с ответом 503."""
+        before = deadline_stats['posts:index']
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertTemplateUsed(response, 'core/503.html')
+        self.assertEqual(deadline_stats['posts:index'], before + 1)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_deadline_stats_view_for_staff_only(self):
+        """Прерванные запросы видны персоналу в /deadline-stats/."""
+        with self.settings(QUERY_DEADLINE=-1, QUERY_DEADLINE_OPCODES=1):
+            self.client.get(reverse('posts:index'))
+        url = reverse('deadline_stats')
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.FOUND)
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_login(admin)
+        stats = self.client.get(url).json()
+        self.assertGreater(stats['posts:index'], 0)
+        self.assertEqual(stats['posts:index'], deadline_stats['posts:index'])
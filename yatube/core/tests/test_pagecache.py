@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Group, Post
+from ..pagecache import SITE, bump, namespaced_key
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Первый пост'
+        )
+        cls.urls = (
+            '/',
+            f'/group/{cls.group.slug}/',
+            f'/profile/{cls.user.username}/',
+            f'/posts/{cls.post.pk}/',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.get(pk=self.post.pk)
+
+    def test_anonymous_pages_served_without_queries(self):
+        """Повторный анонимный запрос не обращается к БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                expected = self.client.get(url).content
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response.content, expected)
+
+    def test_query_string_is_part_of_key(self):
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            self.client.get('/')
+        response = self.client.get('/?page=2')
+        self.assertIsNotNone(response.context)
+
+    def test_authenticated_requests_bypass_cache(self):
+        url = f'/group/{self.group.slug}/'
+        self.client.get(url)
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertContains(response, 'Новая запись')
+
+    def test_writes_invalidate_pages(self):
+        """Изменение поста сбрасывает сохранённые страницы."""
+        url = f'/group/{self.group.slug}/'
+        self.client.get(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertContains(self.client.get(url), 'Исправленный пост')
+
+    def test_login_does_not_invalidate(self):
+        self.client.get('/')
+        self.client.force_login(self.user)
+        self.client.logout()
+        self.client.cookies.clear()
+        with self.assertNumQueries(0):
+            self.client.get('/')
+
+    def test_post_write_invalidates_only_its_feeds(self):
+        """Правка поста не трогает ленты других групп и авторов."""
+        other = User.objects.create_user(username='other')
+        other_group = Group.objects.create(
+            title='Другая', slug='other-slug', description='Описание'
+        )
+        Post.objects.create(author=other, group=other_group, text='Чужой')
+        untouched = ('/group/other-slug/', '/profile/other/')
+        for url in untouched:
+            self.client.get(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url in untouched:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                self.client.get(url)
+        self.assertContains(
+            self.client.get(f'/profile/{self.user.username}/'),
+            'Исправленный пост',
+        )
+
+    def test_moved_post_invalidates_previous_group(self):
+        other_group = Group.objects.create(
+            title='Другая', slug='other-slug', description='Описание'
+        )
+        url = f'/group/{self.group.slug}/'
+        self.assertContains(self.client.get(url), 'Первый пост')
+        self.post.group = other_group
+        self.post.save()
+        self.assertNotContains(self.client.get(url), 'Первый пост')
+
+    def test_post_write_does_not_load_relations(self):
+        """Ленты автора и группы находятся без загрузки связанных объектов."""
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.post.delete()
+        for name in ('author', 'group'):
+            with self.subTest(field=name):
+                field = Post._meta.get_field(name)
+                self.assertFalse(field.is_cached(self.post))
+
+    def test_bump_changes_namespaced_keys(self):
+        key = namespaced_key(['group:test-slug'], 'page')
+        self.assertEqual(namespaced_key(['group:test-slug'], 'page'), key)
+        bump('group:test-slug')
+        self.assertNotEqual(namespaced_key(['group:test-slug'], 'page'), key)
+        other = namespaced_key(['group:other'], 'page')
+        bump(SITE)
+        self.assertNotEqual(namespaced_key(['group:other'], 'page'), other)
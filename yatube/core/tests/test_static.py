@@ -0,0 +1,88 @@
+import gzip
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STATIC_DIR = os.path.join(TEMP_ROOT, 'src')
+STATIC_ROOT = os.path.join(TEMP_ROOT, 'collected')
+CSS = b'body { color: #000; }\n' * 50
+
+
+@override_settings(STATICFILES_DIRS=[STATIC_DIR], STATIC_ROOT=STATIC_ROOT)
+class StaticFilesTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(STATIC_DIR, 'css'))
+        with open(os.path.join(STATIC_DIR, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def hashed_url(self):
+        return staticfiles_storage.url('css/site.css')
+
+    def test_collectstatic_fingerprints_and_compresses(self):
+        """collectstatic добавляет хеш к имени и создаёт .gz рядом."""
+        name = staticfiles_storage.stored_name('css/site.css')
+        self.assertNotEqual(name, 'css/site.css')
+        with gzip.open(staticfiles_storage.path(name) + '.gz') as f:
+            self.assertEqual(f.read(), CSS)
+
+    def test_gzip_variant_served(self):
+        """Сжатый вариант отдаётся по Accept-Encoding с вечным кэшем."""
+        response = self.client.get(
+            self.hashed_url(), HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_identity_when_not_accepted(self):
+        for header in ('', 'gzip;q=0, identity'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    self.hashed_url(), HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(b''.join(response.streaming_content), CSS)
+
+    def test_unhashed_name_revalidated(self):
+        """Файл без хеша в имени браузер должен перепроверять."""
+        response = self.client.get('/static/css/site.css')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = self.client.get(
+            '/static/css/site.css', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_missing_manifest_entry(self):
+        """Без записи в манифесте исходное имя только с явным разрешением."""
+        with self.settings(STATICFILES_MANIFEST_FALLBACK=True):
+            self.assertEqual(
+                staticfiles_storage.stored_name('css/new.css'), 'css/new.css'
+            )
+        with self.settings(STATICFILES_MANIFEST_FALLBACK=False):
+            with self.assertRaises(ValueError):
+                staticfiles_storage.stored_name('css/new.css')
+
+    def test_missing_file(self):
+        response = self.client.get('/static/css/missing.css')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,103 @@
+import datetime
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from ..objectstore import ObjectStoreServer
+from ..storage import ObjectStorage, sign_request
+
+
+class SignRequestTests(TestCase):
+    def test_aws_test_suite_get_vanilla(self):
+        """Подпись совпадает с примером get-vanilla из набора тестов AWS."""
+        headers = sign_request(
+            'GET', 'https://example.amazonaws.com/', {},
+            'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855',
+            'AKIDEXAMPLE', 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY',
+            'us-east-1', service='service',
+            now=datetime.datetime(2015, 8, 30, 12, 36, 0),
+        )
+        self.assertEqual(
+            headers['Authorization'],
+            'AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/20150830/us-east-1/'
+            'service/aws4_request, SignedHeaders=host;x-amz-date, '
+            'Signature=5fa00fa31553b73ebf1942676e86291e8372ff2a2260956d9b8'
+            'aae1d763fbf31',
+        )
+
+
+class ObjectStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.server = ObjectStoreServer(cls.root).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.storage = ObjectStorage(
+            endpoint_url=self.server.url,
+            bucket=f'test-{self._testMethodName}',
+            multipart_threshold=10,
+            part_size=4,
+            max_workers=2,
+        )
+        self.storage.request('PUT', f'{self.server.url}/{self.storage.bucket}')
+
+    def test_save_open_delete(self):
+        name = self.storage.save('posts/a b.txt', ContentFile(b'hello'))
+        self.assertEqual(name, 'posts/a b.txt')
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 5)
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'hello')
+        self.assertEqual(
+            self.storage.url(name),
+            f'{self.server.url}/{self.storage.bucket}/posts/a%20b.txt',
+        )
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open(name)
+
+    def test_multipart_upload(self):
+        """Большой файл загружается по частям и собирается по порядку."""
+        content = bytes(range(256)) * 3
+        name = self.storage.save('posts/big.bin', ContentFile(content))
+        self.storage.metadata_cache.clear()
+        self.assertEqual(self.storage.size(name), len(content))
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), content)
+
+    def test_metadata_cached(self):
+        """exists() и size() сохранённого файла не обращаются к сети."""
+        name = self.storage.save('posts/c.txt', ContentFile(b'abc'))
+        with mock.patch.object(self.storage.session, 'request') as request:
+            self.assertTrue(self.storage.exists(name))
+            self.assertEqual(self.storage.size(name), 3)
+            self.storage.get_modified_time(name)
+        request.assert_not_called()
+
+    def test_available_name(self):
+        first = self.storage.save('posts/d.txt', ContentFile(b'1'))
+        second = self.storage.save('posts/d.txt', ContentFile(b'2'))
+        self.assertNotEqual(first, second)
+
+    def test_listdir(self):
+        for name in ('posts/a.txt', 'posts/b.txt', 'cache/1/x.jpg', 'top'):
+            self.storage.save(name, ContentFile(b'x'))
+        self.assertEqual(
+            self.storage.listdir(''), (['cache', 'posts'], ['top'])
+        )
+        self.assertEqual(
+            self.storage.listdir('posts'), ([], ['a.txt', 'b.txt'])
+        )
@@ -0,0 +1,72 @@
+from io import StringIO
+from threading import Event
+from unittest import mock
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from .. import warmup
+
+User = get_user_model()
+
+
+class WarmUpTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        event = mock.patch.object(warmup, 'warmed_up', Event())
+        event.start()
+        self.addCleanup(event.stop)
+
+    def test_not_ready_until_warmed_up(self):
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 503)
+        warmup.warm_up_process()
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_templates_compiled(self):
+        self.assertGreater(warmup.compile_templates(), 10)
+
+    def warm_caches(self, status_code):
+        user = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        Post.objects.create(author=user, group=group, text='Пост')
+        response = mock.Mock(status_code=status_code)
+        get = mock.patch.object(
+            requests.Session, 'get', return_value=response
+        )
+        out = StringIO()
+        with get as session_get:
+            call_command(
+                'warm_caches', base_urls=['http://web:8000/'],
+                stdout=out, stderr=StringIO(),
+            )
+        return out.getvalue(), session_get
+
+    @override_settings(WARMUP_WAIT_FOR_CACHES=True, RELEASE_ID='2')
+    def test_ready_waits_for_caches(self):
+        warmup.warm_up_process()
+        self.assertFalse(warmup.is_ready())
+        output, session_get = self.warm_caches(200)
+        self.assertIn('Прогрето страниц: 5 из 5', output)
+        self.assertEqual(
+            session_get.call_args_list[0][0][0], 'http://web:8000/'
+        )
+        self.assertTrue(warmup.is_ready())
+        with self.settings(RELEASE_ID='3'):
+            self.assertFalse(warmup.is_ready())
+
+    @override_settings(WARMUP_WAIT_FOR_CACHES=True)
+    def test_failed_warm_up_not_marked(self):
+        warmup.warm_up_process()
+        output, _ = self.warm_caches(500)
+        self.assertIn('Прогрето страниц: 0 из 5', output)
+        self.assertFalse(warmup.is_ready())
@@ -1,6 +1,16 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache, caches
 from django.core.paginator import Paginator
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from .warmup import is_ready
+
+# Число постов ленты меняется вместе с её поколением,
+# срок нужен только чтобы не копить старые ключи.
+COUNT_CACHE_TIMEOUT = 60 * 60
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию;
@@ -12,8 +22,50 @@ def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
 
 
-def page_paginator(request, posts, posts_on_page):
+def service_unavailable(request):
+    response = render(request, 'core/503.html', status=503)
+    response['Retry-After'] = 5
+    return response
+
+
+def ready(request):
+    """Проверка готовности: 200 только после прогрева процесса."""
+    if is_ready():
+        return HttpResponse('ok', content_type='text/plain')
+    return HttpResponse(
+        'warming up', content_type='text/plain', status=503
+    )
+
+
+@staff_member_required
+def cache_stats(request):
+    """Доля попаданий по уровням кэшей этого процесса."""
+    return JsonResponse({
+        alias: caches[alias].stats()
+        for alias in settings.CACHES if hasattr(caches[alias], 'stats')
+    })
+
+
+@staff_member_required
+def query_deadline_stats(request):
+    """Сколько запросов каждого представления прервано по дедлайну БД."""
+    # core.middleware сам импортирует этот модуль.
+    from .middleware import deadline_stats
+    return JsonResponse(dict(deadline_stats))
+
+
+def page_paginator(request, posts, posts_on_page, count_key=None):
+    """
+    Страница объектов posts. С count_key число объектов берётся
+    из кэша: ключ должен включать поколения ленты (namespaced_key).
+    """
     paginator = Paginator(posts, posts_on_page)
+    if count_key is not None:
+        count = cache.get(count_key)
+        if count is None:
+            cache.set(count_key, paginator.count, COUNT_CACHE_TIMEOUT)
+        else:
+            paginator.count = count
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
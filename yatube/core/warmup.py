@@ -0,0 +1,121 @@
+"""
+Прогрев процесса после запуска: шаблоны, URLconf и тяжёлые модули.
+
+start_warm_up() вызывается из wsgi.py и прогревает процесс в фоновом
+потоке; пока прогрев не закончен, /ready/ отвечает 503, и балансировщик
+не направляет на процесс трафик.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import engines
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Модули, которые иначе импортируются только на первом запросе.
+HEAVY_MODULES = (
+    'PIL.Image',
+    'PIL.JpegImagePlugin',
+    'PIL.PngImagePlugin',
+    'PIL.GifImagePlugin',
+    'sorl.thumbnail.engines.pil_engine',
+    'sorl.thumbnail.kvstores.cached_db_kvstore',
+    'posts.templatetags.post_cards',
+)
+# Ключ, который команда warm_caches ставит после прогрева кэшей.
+CACHES_PRIMED_KEY = 'warmup:caches_primed'
+
+warmed_up = threading.Event()
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(('.html', '.txt')):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def compile_templates():
+    """
+    Загружает все шаблоны из каталогов DIRS каждого движка. Django
+    без DEBUG хранит их в кэширующем загрузчике, Jinja2 — в кэше
+    окружения и кэше байт-кода.
+    """
+    count = 0
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for name in template_names(directory):
+                try:
+                    engine.get_template(name)
+                except Exception:
+                    logger.exception('Template warm-up failed: %s', name)
+                    continue
+                count += 1
+    return count
+
+
+def resolve_urls():
+    """Заполняет словари reverse() и namespace у всех резолверов."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for _, (_, namespace_resolver) in resolver.namespace_dict.items():
+        namespace_resolver.reverse_dict
+    return len(resolver.url_patterns)
+
+
+def import_modules():
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    from PIL import Image
+    Image.init()
+    from sorl.thumbnail import default
+    for name in ('backend', 'engine', 'kvstore', 'storage'):
+        getattr(default, name).__class__
+    return len(HEAVY_MODULES)
+
+
+def warm_up_process():
+    """Прогревает текущий процесс и отмечает его готовым."""
+    started = time.monotonic()
+    try:
+        modules = import_modules()
+        patterns = resolve_urls()
+        templates = compile_templates()
+        logger.info(
+            'Warm-up finished in %.2f s: %d modules, %d url patterns, '
+            '%d templates',
+            time.monotonic() - started, modules, patterns, templates,
+        )
+    finally:
+        warmed_up.set()
+
+
+def start_warm_up():
+    if not settings.WARMUP_ON_START:
+        warmed_up.set()
+        return None
+    thread = threading.Thread(
+        target=warm_up_process, name='warm-up', daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def caches_primed_key():
+    """Отметка о прогреве кэшей текущей выкладки."""
+    return f'{CACHES_PRIMED_KEY}:{settings.RELEASE_ID}'
+
+
+def is_ready():
+    if not warmed_up.is_set():
+        return False
+    if settings.WARMUP_WAIT_FOR_CACHES:
+        return bool(cache.get(caches_primed_key()))
+    return True
@@ -1,6 +1,18 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment
+from .deletion import schedule_deletion
+from .models import ArchivedPost, DeletionTask, Post, Group, Comment
+
+
+class QueuedDeletionMixin:
+    """Вместо удаления в запросе ставит объекты в очередь удаления."""
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -17,6 +29,25 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-admin.site.register(Group)
+class GroupAdmin(QueuedDeletionMixin, admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+
+
+class DeletionTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'processed',
+        'total',
+        'created',
+        'finished',
+    )
+    list_filter = ('kind',)
+
+
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment)
 admin.site.register(Post, PostAdmin)
+admin.site.register(ArchivedPost)
+admin.site.register(DeletionTask, DeletionTaskAdmin)
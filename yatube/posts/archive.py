@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+ARCHIVE_BATCH_SIZE = 100
+
+
+def archive_posts(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Переносит посты старше cutoff вместе с комментариями в архивные
+    таблицы. Каждая пачка переносится в отдельной транзакции,
+    чтобы не держать блокировку записи долго. Возвращает число постов.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            posts = list(
+                Post.objects.filter(created__lt=cutoff)
+                .order_by('created')[:batch_size]
+            )
+            if not posts:
+                break
+            ArchivedPost.objects.bulk_create(
+                ArchivedPost(
+                    pk=post.pk,
+                    text=post.text,
+                    excerpt_html=post.excerpt_html,
+                    author_id=post.author_id,
+                    group_id=post.group_id,
+                    image=post.image.name,
+                    created=post.created,
+                    **{
+                        field: getattr(post, field)
+                        for field in Post.IMAGE_METADATA_FIELDS
+                    },
+                )
+                for post in posts
+            )
+            ArchivedComment.objects.bulk_create(
+                ArchivedComment(
+                    pk=comment.pk,
+                    post_id=comment.post_id,
+                    author_id=comment.author_id,
+                    text=comment.text,
+                    created=comment.created,
+                )
+                for comment in Comment.objects.filter(post__in=posts)
+            )
+            Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
+        moved += len(posts)
+    return moved
+
+
+def get_post_or_archived(post_id):
+    """Возвращает пост и признак того, что он взят из архива."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        return post, False
+    return get_object_or_404(ArchivedPost, pk=post_id), True
+
+
+class PostHistory:
+    """
+    Последовательность для паджинатора: сначала актуальные посты,
+    затем архивные. Архивные посты всегда старше актуальных,
+    поэтому порядок по дате сохраняется без пропусков на стыке.
+    """
+
+    def __init__(self, posts, archived_posts):
+        self.posts = posts
+        self.archived_posts = archived_posts
+        self._posts_count = None
+
+    @property
+    def posts_count(self):
+        if self._posts_count is None:
+            self._posts_count = self.posts.count()
+        return self._posts_count
+
+    def count(self):
+        return self.posts_count + self.archived_posts.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        hot = self.posts_count
+        result = []
+        if start < hot:
+            result += list(self.posts[start:min(stop, hot)])
+        if stop > hot:
+            result += list(
+                self.archived_posts[max(start - hot, 0):stop - hot]
+            )
+        return result
@@ -0,0 +1,128 @@
+import time
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_image
+
+from .models import (ArchivedComment, ArchivedPost, Comment, DeletionTask,
+                     Follow, Group, Post, User)
+
+DELETION_BATCH_SIZE = 100
+
+
+def pending_ids(kind):
+    """Подзапрос с id объектов, ожидающих удаления."""
+    return DeletionTask.objects.filter(
+        kind=kind, finished__isnull=True
+    ).values('object_id')
+
+
+def is_pending(kind, object_id):
+    return DeletionTask.objects.filter(
+        kind=kind, object_id=object_id, finished__isnull=True
+    ).exists()
+
+
+def visible_posts(posts):
+    """Скрывает посты авторов, поставленных в очередь на удаление."""
+    return posts.exclude(author_id__in=pending_ids(DeletionTask.USER))
+
+
+def visible_comments(comments):
+    return comments.exclude(author_id__in=pending_ids(DeletionTask.USER))
+
+
+def user_querysets(user):
+    return (
+        Follow.objects.filter(user=user),
+        Follow.objects.filter(author=user),
+        Comment.objects.filter(author=user),
+        Post.objects.filter(author=user),
+        ArchivedComment.objects.filter(author=user),
+        ArchivedPost.objects.filter(author=user),
+    )
+
+
+def group_querysets(group):
+    return (
+        Post.objects.filter(group=group),
+        ArchivedPost.objects.filter(group=group),
+    )
+
+
+def schedule_deletion(obj):
+    """
+    Ставит пользователя или группу в очередь на удаление.
+    Объект сразу перестаёт показываться, пользователь — ещё и входить
+    на сайт, а сами строки удаляет команда process_deletions.
+    """
+    if isinstance(obj, Group):
+        kind, querysets = DeletionTask.GROUP, group_querysets(obj)
+    else:
+        kind, querysets = DeletionTask.USER, user_querysets(obj)
+        if obj.is_active:
+            obj.is_active = False
+            obj.save(update_fields=['is_active'])
+    task, _ = DeletionTask.objects.get_or_create(
+        kind=kind,
+        object_id=obj.pk,
+        defaults={'total': sum(qs.count() for qs in querysets)},
+    )
+    return task
+
+
+def _delete_batch(queryset):
+    images = []
+    if queryset.model in (Post, ArchivedPost):
+        images = [
+            name for name in queryset.values_list('image', flat=True) if name
+        ]
+    queryset.delete()
+    # Файлы удаляются только после фиксации транзакции.
+    for name in images:
+        transaction.on_commit(partial(delete_image, name))
+
+
+def _in_batches(task, queryset, action, batch_size, pause):
+    """
+    Применяет action к queryset пачками по batch_size строк,
+    каждая пачка — в отдельной короткой транзакции.
+    """
+    while True:
+        with transaction.atomic():
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return
+            action(queryset.model.objects.filter(pk__in=pks))
+            task.processed += len(pks)
+            task.save(update_fields=['processed'])
+        time.sleep(pause)
+
+
+def process_task(task, batch_size=DELETION_BATCH_SIZE, pause=0):
+    if task.kind == DeletionTask.GROUP:
+        obj = Group.objects.filter(pk=task.object_id).first()
+        if obj is not None:
+            for queryset in group_querysets(obj):
+                _in_batches(
+                    task, queryset, lambda qs: qs.update(group=None),
+                    batch_size, pause
+                )
+    else:
+        obj = User.objects.filter(pk=task.object_id).first()
+        if obj is not None:
+            for queryset in user_querysets(obj):
+                _in_batches(task, queryset, _delete_batch, batch_size, pause)
+    with transaction.atomic():
+        if obj is not None:
+            obj.delete()
+        task.finished = timezone.now()
+        task.save(update_fields=['finished'])
+
+
+def process_deletions(batch_size=DELETION_BATCH_SIZE, pause=0):
+    tasks = DeletionTask.objects.filter(finished__isnull=True)
+    for task in tasks:
+        process_task(task, batch_size, pause)
+    return len(tasks)
@@ -0,0 +1,40 @@
+from django.template.defaultfilters import linebreaks_filter, truncatechars
+
+from core.pagecache import invalidate_pages
+
+# Длина текста поста в карточке.
+CHAR_IN_POST = 200
+
+
+def make_excerpt(text):
+    """
+    HTML начала поста для карточки — то же, что дал бы шаблон
+    {{ text|truncatechars:CHAR_IN_POST|linebreaks }}.
+    """
+    return linebreaks_filter(truncatechars(text, CHAR_IN_POST), True)
+
+
+def backfill_excerpts(model, batch_size=100, rebuild=False):
+    """
+    Заполняет excerpt_html у постов model, где его ещё нет, или
+    пересчитывает у всех (rebuild) после изменения CHAR_IN_POST.
+    """
+    posts = model.objects.all()
+    if not rebuild:
+        posts = posts.filter(excerpt_html='')
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            posts.filter(pk__gt=last_pk).order_by('pk')
+            .only('pk', 'text')[:batch_size]
+        )
+        if not batch:
+            return updated
+        for post in batch:
+            post.excerpt_html = make_excerpt(post.text)
+        model.objects.bulk_update(batch, ['excerpt_html'])
+        # bulk_update не отправляет сигналы post_save.
+        invalidate_pages()
+        updated += len(batch)
+        last_pk = batch[-1].pk
@@ -0,0 +1,265 @@
+"""
+Выгрузка публичных страниц в статические файлы для CDN или nginx.
+
+Страницы групп, профилей и постов рендерятся для анонимного
+посетителя. Первая страница списка кладётся в <путь>/index.html,
+остальные — в <путь>/page-<N>.html. manifest.json сопоставляет URL
+с файлами (pages) и хранит, что нужно для следующего запуска:
+номер последней обработанной записи журнала PageChange, страницы
+каждой области (группы, автора, поста) и группу и автора постов.
+"""
+import json
+import math
+import os
+import posixpath
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.models import Max
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .deletion import is_pending, pending_ids, visible_posts
+from .models import (ArchivedPost, Comment, DeletionTask, Group, PageChange,
+                     Post, User)
+from .views import POST_ON_PAGE, POST_ON_PROFILE
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def page_file(url):
+    """Файл выгрузки для URL страницы, относительно каталога выгрузки."""
+    path, _, query = url.partition('?')
+    page = query.partition('page=')[2]
+    name = f'page-{page}.html' if page else 'index.html'
+    return posixpath.join(path.strip('/'), name)
+
+
+def paged_urls(url, count, per_page):
+    pages = max(1, math.ceil(count / per_page))
+    return [url] + [f'{url}?page={number}' for number in range(2, pages + 1)]
+
+
+def scope_urls(scope):
+    """URL страниц области 'group:<id>', 'author:<id>' или 'post:<id>'."""
+    kind, _, pk = scope.partition(':')
+    pk = int(pk)
+    if kind == 'group':
+        group = Group.objects.exclude(
+            pk__in=pending_ids(DeletionTask.GROUP)
+        ).filter(pk=pk).first()
+        if group is None:
+            return []
+        count = visible_posts(group.posts.all()).count()
+        return paged_urls(
+            reverse('posts:group_list', args=[group.slug]),
+            count, POST_ON_PAGE,
+        )
+    if kind == 'author':
+        author = User.objects.filter(pk=pk).first()
+        if author is None or is_pending(DeletionTask.USER, pk):
+            return []
+        count = author.posts.count() + author.archived_posts.count()
+        if not count:
+            return []
+        return paged_urls(
+            reverse('posts:profile', args=[author.username]),
+            count, POST_ON_PROFILE,
+        )
+    return [reverse('posts:post_detail', args=[pk])]
+
+
+def post_scopes(post_ids):
+    """{id поста: [id автора, id группы]} для постов и архивных постов."""
+    scopes = {}
+    for model in (ArchivedPost, Post):
+        rows = model.objects.filter(pk__in=post_ids).values_list(
+            'pk', 'author_id', 'group_id'
+        )
+        scopes.update((pk, [author, group]) for pk, author, group in rows)
+    return scopes
+
+
+def all_scopes():
+    post_ids = set(Post.objects.values_list('pk', flat=True))
+    post_ids.update(ArchivedPost.objects.values_list('pk', flat=True))
+    scopes = {f'post:{pk}' for pk in post_ids}
+    scopes.update(
+        f'group:{pk}' for pk in Group.objects.values_list('pk', flat=True)
+    )
+    for model in (Post, ArchivedPost):
+        scopes.update(
+            f'author:{pk}' for pk in
+            model.objects.values_list('author_id', flat=True).distinct()
+        )
+    return scopes
+
+
+def changed_scopes(changes, manifest):
+    """Области, затронутые записями журнала changes."""
+    post_ids, group_ids, user_ids = set(), set(), set()
+    scopes = set()
+    for kind, pk in changes.values_list('kind', 'object_id'):
+        if kind == PageChange.COMMENT:
+            scopes.add(f'post:{pk}')
+        elif kind == PageChange.POST:
+            post_ids.add(pk)
+        elif kind == PageChange.GROUP:
+            group_ids.add(pk)
+        else:
+            user_ids.add(pk)
+    # Название группы и имя автора видны в карточках и на странице поста.
+    for model in (Post, ArchivedPost):
+        post_ids.update(
+            model.objects.filter(group_id__in=group_ids)
+            .values_list('pk', flat=True)
+        )
+        post_ids.update(
+            model.objects.filter(author_id__in=user_ids)
+            .values_list('pk', flat=True)
+        )
+    post_ids.update(
+        Comment.objects.filter(author_id__in=user_ids)
+        .values_list('post_id', flat=True)
+    )
+    scopes.update(f'group:{pk}' for pk in group_ids)
+    scopes.update(f'author:{pk}' for pk in user_ids)
+    old = manifest['posts']
+    current = post_scopes(post_ids)
+    missing = [None, None]
+    for pk in post_ids:
+        scopes.add(f'post:{pk}')
+        # Пост мог сменить группу или исчезнуть: прежние области тоже.
+        for author, group in (
+            old.get(str(pk), missing), current.get(pk, missing)
+        ):
+            if author:
+                scopes.add(f'author:{author}')
+            if group:
+                scopes.add(f'group:{group}')
+    return scopes
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(content)
+    os.replace(temporary, path)
+
+
+def render_page(output, url):
+    """
+    Рендерит страницу для анонимного посетителя и записывает её
+    в output. Возвращает (url, файл) или (url, None), если страницы нет.
+    """
+    path = url.partition('?')[0]
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    request.resolver_match = match = resolve(path)
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        return url, None
+    if response.status_code != 200:
+        return url, None
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+    else:
+        content = response.content
+    name = page_file(url)
+    write_file(os.path.join(output, name), content)
+    return url, name
+
+
+def render_pages(output, urls, workers):
+    render = partial(render_page, output)
+    if workers <= 1:
+        return dict(map(render, urls))
+    # Дочерние процессы не должны делить соединения с родителем.
+    connections.close_all()
+    with ProcessPoolExecutor(workers) as executor:
+        return dict(executor.map(render, urls, chunksize=16))
+
+
+def load_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST_NAME)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def remove_file(output, name):
+    try:
+        os.remove(os.path.join(output, name))
+    except FileNotFoundError:
+        pass
+
+
+def export_pages(output, workers=1, full=False):
+    """
+    Выгружает страницы в каталог output. Без full перерисовываются
+    только области, изменившиеся с прошлого запуска по журналу
+    PageChange. Возвращает (записано страниц, удалено страниц).
+    """
+    manifest = load_manifest(output)
+    journal = settings.STATIC_EXPORT_JOURNAL
+    # Выгрузка без журнала не знает, что менялось после неё.
+    full = (
+        full or not journal or manifest is None
+        or manifest.get('journal_id') is None
+    )
+    last_change = PageChange.objects.aggregate(last=Max('pk'))['last'] or 0
+    if full:
+        old_scopes = manifest['scopes'] if manifest else {}
+        manifest = {'pages': {}, 'scopes': {}, 'posts': {}}
+        scopes = all_scopes() | set(old_scopes)
+    else:
+        old_scopes = manifest['scopes']
+        scopes = changed_scopes(
+            PageChange.objects.filter(
+                pk__gt=manifest['journal_id'], pk__lte=last_change
+            ),
+            manifest,
+        )
+    planned = {scope: scope_urls(scope) for scope in scopes}
+    rendered = render_pages(
+        output, [url for urls in planned.values() for url in urls], workers
+    )
+    written = removed = 0
+    for scope, urls in planned.items():
+        for url in old_scopes.get(scope, []):
+            if not rendered.get(url):
+                remove_file(output, page_file(url))
+                manifest['pages'].pop(url, None)
+                removed += 1
+        urls = [url for url in urls if rendered[url]]
+        manifest['pages'].update((url, rendered[url]) for url in urls)
+        written += len(urls)
+        if urls:
+            manifest['scopes'][scope] = urls
+        else:
+            manifest['scopes'].pop(scope, None)
+    post_ids = [
+        int(scope[len('post:'):]) for scope in planned
+        if scope.startswith('post:')
+    ]
+    current = post_scopes(post_ids)
+    for pk in post_ids:
+        if pk in current:
+            manifest['posts'][str(pk)] = current[pk]
+        else:
+            manifest['posts'].pop(str(pk), None)
+    manifest['journal_id'] = last_change if journal else None
+    write_file(
+        os.path.join(output, MANIFEST_NAME),
+        json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode(),
+    )
+    PageChange.objects.filter(pk__lte=last_change).delete()
+    return written, removed
@@ -1,5 +1,6 @@
 from django import forms
 
+from .images import update_image_metadata
 from .models import Post, Comment
 
 
@@ -9,6 +10,27 @@ class PostForm(forms.ModelForm):
         fields = ('group', 'text', 'image')
         labels = {'image': 'Картинка'}
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Отклонённую при загрузке картинку не отдаём полю ImageField,
+        # чтобы Pillow её не открывал.
+        self.image_error = ''
+        image = self.files.get('image')
+        if getattr(image, 'rejected', ''):
+            self.image_error = image.rejected
+            self.files = self.files.copy()
+            self.files.pop('image')
+
+    def clean_image(self):
+        if self.image_error:
+            raise forms.ValidationError(self.image_error)
+        return self.cleaned_data['image']
+
+    def save(self, commit=True):
+        if 'image' in self.changed_data:
+            update_image_metadata(self.instance, self.cleaned_data['image'])
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from PIL import Image
+
+from core.pagecache import invalidate_pages
+
+from .models import Post
+from .thumbnails import create_post_thumbnails
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+_executor = None
+
+
+def image_executor():
+    """Пул потоков для обработки загруженных картинок постов."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            settings.POST_IMAGE_WORKERS,
+            thread_name_prefix='post-images',
+        )
+    return _executor
+
+
+def make_placeholder(image):
+    """
+    Крошечная копия картинки в виде data URI для показа
+    до загрузки миниатюры.
+    """
+    image.draft('RGB', (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    small = image.convert('RGB')
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    small.save(buffer, format='JPEG', quality=PLACEHOLDER_QUALITY)
+    data = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f'data:image/jpeg;base64,{data}'
+
+
+def read_image_metadata(file):
+    """
+    Возвращает размеры, формат, размер в байтах, sha256 картинки
+    и заглушку для ленивой загрузки. Файл хешируется по частям.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        image_format = image.format or ''
+        placeholder = make_placeholder(image)
+    file.seek(0)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': file.size,
+        'image_format': image_format,
+        'image_hash': digest.hexdigest(),
+        'image_placeholder': placeholder,
+    }
+
+
+def read_upload_metadata(file):
+    """
+    Метаданные, собранные StreamingImageUploadHandler при загрузке.
+    Заглушку создаст фоновая обработка process_post_image.
+    """
+    width, height = file.image_dimensions
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': file.size,
+        'image_format': file.image_format,
+        'image_hash': file.sha256,
+        'image_placeholder': '',
+    }
+
+
+def update_image_metadata(post, file):
+    """Заполняет поля метаданных поста по файлу или очищает их."""
+    if getattr(file, 'sha256', None):
+        metadata = read_upload_metadata(file)
+    elif file:
+        metadata = read_image_metadata(file)
+    else:
+        metadata = {
+            'image_width': None,
+            'image_height': None,
+            'image_size': None,
+            'image_format': '',
+            'image_hash': '',
+            'image_placeholder': '',
+        }
+    for field, value in metadata.items():
+        setattr(post, field, value)
+
+
+def backfill_image_metadata(batch_size=100):
+    """Заполняет метаданные картинок у постов, где их ещё нет."""
+    updated = 0
+    last_pk = 0
+    while True:
+        posts = list(
+            Post.objects.exclude(image='')
+            .filter(Q(image_hash='') | Q(image_placeholder=''))
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', 'image')[:batch_size]
+        )
+        if not posts:
+            return updated
+        done = []
+        for post in posts:
+            try:
+                with post.image.open('rb') as file:
+                    update_image_metadata(post, file)
+            except (OSError, ValueError):
+                continue
+            done.append(post)
+        Post.objects.bulk_update(done, Post.IMAGE_METADATA_FIELDS)
+        # bulk_update не отправляет сигналы post_save.
+        invalidate_pages()
+        updated += len(done)
+        last_pk = posts[-1].pk
+
+
+def process_post_image(pk, name):
+    """
+    Создаёт миниатюры и заглушку картинки name поста pk вне запроса.
+    Сохранение заглушки сбрасывает кэш страниц поста, и в них
+    появляются заглушка и srcset. Если картинку уже заменили или пост
+    удалили, ничего не делает.
+    """
+    try:
+        post = Post.objects.filter(pk=pk, image=name).first()
+        if post is None:
+            return
+        create_post_thumbnails(post)
+        with post.image.open('rb') as file, Image.open(file) as image:
+            post.image_placeholder = make_placeholder(image)
+        post.save(update_fields=['image_placeholder'])
+    except Exception:
+        logger.exception('Post image processing failed: %s', name)
+    finally:
+        connections.close_all()
+
+
+def queue_post_image(post):
+    """Ставит картинку сохранённого поста в очередь обработки."""
+    image_executor().submit(process_post_image, post.pk, post.image.name)
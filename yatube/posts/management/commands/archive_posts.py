@@ -0,0 +1,24 @@
+import datetime as dt
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import ARCHIVE_BATCH_SIZE, archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Архивировать посты старше указанного числа дней.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=ARCHIVE_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - dt.timedelta(days=options['days'])
+        moved = archive_posts(cutoff, options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {moved}')
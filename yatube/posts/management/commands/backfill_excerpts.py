@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.excerpts import backfill_excerpts
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет HTML начала текста для карточек постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать у всех постов, например после смены длины.'
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            updated = backfill_excerpts(
+                model, options['batch_size'], options['rebuild']
+            )
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: обновлено {updated}'
+            )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import backfill_image_metadata
+
+
+class Command(BaseCommand):
+    help = 'Заполняет размеры, формат и хеш картинок существующих постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        updated = backfill_image_metadata(options['batch_size'])
+        self.stdout.write(f'Обновлено постов: {updated}')
@@ -0,0 +1,35 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.export import export_pages
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает страницы групп, профилей и постов в статические '
+        'файлы и пишет manifest.json для веб-сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=settings.STATIC_EXPORT_ROOT,
+            help='Каталог выгрузки.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов для рендеринга.'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Перерисовать все страницы, а не только изменившиеся.'
+        )
+
+    def handle(self, *args, **options):
+        written, removed = export_pages(
+            options['output'], options['workers'], options['full']
+        )
+        self.stdout.write(
+            f'Записано страниц: {written}, удалено: {removed}'
+        )
@@ -0,0 +1,198 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from posts.models import ArchivedPost, Post
+from posts.thumbnails import kvstore_key
+
+UPLOAD_DIR = 'posts'
+
+
+def iter_files(root):
+    """Обходит дерево файлов, не собирая список целиком."""
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def referenced_images(names):
+    """Какие из имён файлов указаны в картинках постов."""
+    referenced = set(
+        Post.objects.filter(image__in=names).values_list('image', flat=True)
+    )
+    referenced.update(
+        ArchivedPost.objects.filter(image__in=names)
+        .values_list('image', flat=True)
+    )
+    return referenced
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые больше нет ссылок, '
+        'их миниатюры и устаревшие записи хранилища sorl.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что было бы удалено.'
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками удалений.'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Не трогать файлы моложе указанного числа секунд.'
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.pause = options['pause']
+        self.cutoff = time.time() - options['min_age']
+        # Ключи sorl, которые удалил (или удалил бы) первый проход:
+        # миниатюры с такими ключами второй проход считает мусором.
+        self.dropped_keys = set()
+        self.report('Устаревшие записи sorl', self.collect_kvstore())
+        self.report('Миниатюры без записей', *self.collect_thumbnails())
+        self.report('Картинки без постов', *self.collect_originals())
+
+    def report(self, title, count, size=None):
+        action = 'найдено' if self.dry_run else 'удалено'
+        line = f'{title}: {action} {count}'
+        if size is not None:
+            line += f', {size // 1024} КБ'
+        self.stdout.write(line)
+
+    def throttle(self, deleted):
+        if deleted and not self.dry_run:
+            time.sleep(self.pause)
+
+    def collect_files(self, root, is_garbage):
+        count = size = 0
+        old_files = (
+            entry for entry in iter_files(root)
+            if entry.stat().st_mtime < self.cutoff
+        )
+        for batch in batched(old_files, self.batch_size):
+            garbage = is_garbage(batch)
+            for entry in garbage:
+                count += 1
+                size += entry.stat().st_size
+                if not self.dry_run:
+                    os.remove(entry.path)
+            self.throttle(garbage)
+        return count, size
+
+    def media_name(self, entry):
+        relative = os.path.relpath(entry.path, settings.MEDIA_ROOT)
+        return relative.replace(os.sep, '/')
+
+    def collect_originals(self):
+        def unreferenced(entries):
+            names = [self.media_name(entry) for entry in entries]
+            referenced = referenced_images(names)
+            return [
+                entry for entry, name in zip(entries, names)
+                if name not in referenced
+            ]
+        root = os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR)
+        return self.collect_files(root, unreferenced)
+
+    def collect_thumbnails(self):
+        def unknown(entries):
+            keys = [kvstore_key(self.media_name(entry)) for entry in entries]
+            known = set(
+                KVStoreModel.objects.filter(key__in=keys)
+                .values_list('key', flat=True)
+            )
+            return [
+                entry for entry, key in zip(entries, keys)
+                if key not in known or key in self.dropped_keys
+            ]
+        root = os.path.join(
+            settings.MEDIA_ROOT, thumbnail_settings.THUMBNAIL_PREFIX
+        )
+        return self.collect_files(root, unknown)
+
+    def source_keys(self, source):
+        """Ключи sorl исходной картинки, списка её миниатюр и миниатюр."""
+        thumbnails = default.kvstore._get(source.key, identity='thumbnails')
+        return [
+            add_prefix(source.key),
+            add_prefix(source.key, 'thumbnails'),
+            *(add_prefix(key) for key in thumbnails or []),
+        ]
+
+    def collect_kvstore(self):
+        """
+        Удаляет записи sorl об исходных картинках, на которые
+        больше нет ссылок, и записи их миниатюр. Файлы миниатюр
+        удалит следующий проход как файлы без записей.
+        """
+        prefix = add_prefix('')
+        last_key = prefix
+        count = 0
+        while True:
+            rows = list(
+                KVStoreModel.objects.filter(
+                    key__startswith=prefix, key__gt=last_key
+                ).order_by('key').values_list('key', 'value')[
+                    :self.batch_size
+                ]
+            )
+            if not rows:
+                return count
+            last_key = rows[-1][0]
+            sources = [
+                deserialize_image_file(value) for _, value in rows
+            ]
+            sources = [
+                source for source in sources if not source.name.startswith(
+                    thumbnail_settings.THUMBNAIL_PREFIX
+                )
+            ]
+            referenced = referenced_images(
+                [source.name for source in sources]
+            )
+            stale = [
+                source for source in sources
+                if source.name not in referenced
+            ]
+            for source in stale:
+                count += 1
+                keys = self.source_keys(source)
+                self.dropped_keys.update(keys)
+                if not self.dry_run:
+                    default.kvstore._delete_raw(*keys)
+            self.throttle(stale)
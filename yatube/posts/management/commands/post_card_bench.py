@@ -0,0 +1,148 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+from django.template.backends.django import get_installed_libraries
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+from sorl.thumbnail.images import ImageFile
+
+from posts.excerpts import CHAR_IN_POST, make_excerpt
+from posts.models import Group, Post, User
+
+# Карточка в виде шаблона, как её выводил {% include %} до тега
+# post_card: точка отсчёта для сравнения.
+INCLUDE_CARD = """{% load thumbnail %}
+<article>
+  <ul>
+    {% if request.resolver_match.view_name != 'posts:profile' %}
+      <li>
+        Автор:
+        <a href="{% url 'posts:profile' post.author.username %}">
+          {{ post.author.get_full_name }}
+        </a>
+      </li>
+    {% endif %}
+    <li>
+      Дата публикации: {{ post.created|date:"d E Y" }}
+    </li>
+    {% if request.resolver_match.view_name != 'posts:group_list' %}
+      {% if post.group %}
+        <li>
+          Группа:
+          <a href="{% url 'posts:group_list' post.group.slug %}">
+            {{ post.group.title }}
+          </a>
+        </li>
+      {% endif %}
+    {% endif %}
+  </ul>
+  {% if post.thumbnail %}
+    <picture>
+      {% if post.thumbnail_srcset %}
+        <source type="{{ post.thumbnail_type }}"
+                srcset="{{ post.thumbnail_srcset }}"
+                sizes="(min-width: 992px) 960px, 100vw">
+      {% endif %}
+      <img class="card-img my-2" src="{{ post.thumbnail.url }}" loading="lazy"
+           {% if post.image_placeholder %}style="background: url('{{ post.image_placeholder }}') center / cover no-repeat"{% endif %}
+           {% if post.thumbnail.size %}width="{{ post.thumbnail.width }}" height="{{ post.thumbnail.height }}"{% endif %}>
+    </picture>
+  {% else %}
+    {% thumbnail post.image "960x339" crop="center" upscale=True as im %}
+      <img class="card-img my-2" src="{{ im.url }}" loading="lazy"
+           {% if im.size %}width="{{ im.width }}" height="{{ im.height }}"{% endif %}>
+    {% endthumbnail %}
+  {% endif %}
+  <p>
+    {% if post.excerpt_html %}
+      {{ post.excerpt_html|safe }}
+    {% else %}
+      {{ post.text|truncatechars:char_br|linebreaks }}
+    {% endif %}
+    <a href="{% url 'posts:post_detail' post.pk %}">подробная инфомация</a>
+  </p>
+</article>"""  # noqa: E501
+INCLUDE_LOOP = (
+    "{% for post in posts %}"
+    "{% include include_card %}"
+    "{% if not forloop.last %}<hr>{% endif %}"
+    "{% endfor %}"
+)
+POST_CARD_LOOP = (
+    "{% load post_cards %}"
+    "{% for post in posts %}"
+    "{% post_card post %}"
+    "{% if not forloop.last %}<hr>{% endif %}"
+    "{% endfor %}"
+)
+
+
+def make_posts(count):
+    """Посты в памяти, без обращений к БД и к файлам."""
+    group = Group(pk=1, slug='bench', title='Группа')
+    posts = []
+    for number in range(1, count + 1):
+        author = User(
+            pk=number, username=f'user{number}',
+            first_name='Имя', last_name='Фамилия',
+        )
+        text = f'Пост {number}\n' + 'текст ' * 100
+        post = Post(
+            pk=number, author=author, group=group, text=text,
+            excerpt_html=make_excerpt(text), created=timezone.now(),
+        )
+        post.thumbnail = ImageFile(f'cache/bench/{number}.jpg')
+        post.thumbnail.set_size((960, 339))
+        posts.append(post)
+    return posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время вывода карточки поста шаблоном через include '
+        'и тегом post_card.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Кэширующий загрузчик, как в боевом режиме с DEBUG=False.
+        engine = Engine(
+            dirs=settings.TEMPLATES[0]['DIRS'],
+            loaders=[('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ])],
+            libraries=get_installed_libraries(),
+        )
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve('/')
+        context = {
+            'posts': make_posts(options['posts']),
+            'request': request,
+            'char_br': CHAR_IN_POST,
+            'include_card': engine.from_string(INCLUDE_CARD),
+        }
+        cards = options['posts'] * options['repeat']
+        results = {}
+        for name, source in (('include', INCLUDE_LOOP),
+                             ('post_card', POST_CARD_LOOP)):
+            template = engine.from_string(source)
+            template.render(Context(context))
+            best = float('inf')
+            for _ in range(options['rounds']):
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    template.render(Context(context))
+                best = min(best, time.perf_counter() - started)
+            results[name] = best / cards * 1e6
+            self.stdout.write(f'{name}: {results[name]:.1f} мкс на карточку')
+        self.stdout.write(
+            f'Ускорение: {results["include"] / results["post_card"]:.1f}x'
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.deletion import DELETION_BATCH_SIZE, process_deletions
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет отложенные удаления пользователей и групп '
+        'небольшими пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DELETION_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками, чтобы не задерживать запись сайта.'
+        )
+
+    def handle(self, *args, **options):
+        count = process_deletions(options['batch_size'], options['pause'])
+        self.stdout.write(f'Обработано задач удаления: {count}')
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.urls import resolve
+
+from .post_card_bench import make_posts
+
+try:
+    from django.template.backends.jinja2 import Jinja2
+except ImportError:
+    Jinja2 = None
+
+
+def django_engine():
+    """DjangoTemplates из настроек, но с кэширующим загрузчиком."""
+    options = dict(settings.TEMPLATES[-1]['OPTIONS'], debug=False)
+    options['loaders'] = [('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ])]
+    return DjangoTemplates({
+        'NAME': 'bench-django',
+        'DIRS': settings.TEMPLATES[-1]['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+def jinja2_engine():
+    params = settings.JINJA2_TEMPLATES
+    return Jinja2({
+        'NAME': 'bench-jinja2',
+        'DIRS': params['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': dict(params['OPTIONS'], auto_reload=False),
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость рендеринга горячего шаблона '
+        'в DjangoTemplates и Jinja2.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', default='posts/index.html')
+        parser.add_argument('--posts', type=int, default=10)
+        parser.add_argument('--seconds', type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        if Jinja2 is None:
+            raise CommandError('Для сравнения нужен пакет jinja2.')
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.resolver_match = resolve('/')
+        page_obj = Paginator(make_posts(options['posts']), 10).page(1)
+        results = {}
+        for name, engine in (('django', django_engine()),
+                             ('jinja2', jinja2_engine())):
+            template = engine.get_template(options['template'])
+            template.render({'page_obj': page_obj}, request)
+            rendered = 0
+            started = time.perf_counter()
+            deadline = started + options['seconds']
+            while time.perf_counter() < deadline:
+                template.render({'page_obj': page_obj}, request)
+                rendered += 1
+            results[name] = rendered / (time.perf_counter() - started)
+            self.stdout.write(f'{name}: {results[name]:.0f} страниц/с')
+        ratio = results['jinja2'] / results['django']
+        self.stdout.write(f'Jinja2 / Django: {ratio:.2f}')
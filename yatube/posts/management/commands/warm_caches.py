@@ -0,0 +1,86 @@
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.urls import reverse
+
+from core.warmup import caches_primed_key
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэши после выкладки: запрашивает по HTTP как анонимный '
+        'посетитель первые страницы ленты, самые большие группы '
+        'и профили самых активных авторов у каждого процесса приложения. '
+        'Если все страницы ответили 200, отмечает кэши текущей выкладки '
+        'прогретыми.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--index-pages', type=int, default=3)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--profiles', type=int, default=20)
+        parser.add_argument(
+            '--base-url', action='append', dest='base_urls',
+            help='Адрес процесса приложения, можно указать несколько раз. '
+                 'По умолчанию WARMUP_BASE_URLS.'
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def urls(self, options):
+        index = reverse('posts:index')
+        yield index
+        for number in range(2, options['index_pages'] + 1):
+            yield f'{index}?page={number}'
+        groups = Group.objects.annotate(
+            posts_count=Count('posts')
+        ).order_by('-posts_count').values_list('slug', flat=True)
+        for slug in groups[:options['groups']]:
+            yield reverse('posts:group_list', args=[slug])
+        authors = User.objects.annotate(
+            posts_count=Count('posts')
+        ).filter(posts_count__gt=0).order_by('-posts_count')
+        for username in authors.values_list(
+            'username', flat=True
+        )[:options['profiles']]:
+            yield reverse('posts:profile', args=[username])
+
+    def fetch(self, session, url, timeout):
+        try:
+            status = session.get(
+                url, timeout=timeout, allow_redirects=False
+            ).status_code
+        except requests.RequestException as error:
+            status = error
+        # Без cookies запросы остаются анонимными и попадают в общий кэш.
+        session.cookies.clear()
+        if status != 200:
+            self.stderr.write(f'{url}: {status}')
+            return False
+        return True
+
+    def handle(self, *args, **options):
+        base_urls = options['base_urls'] or settings.WARMUP_BASE_URLS
+        urls = list(self.urls(options))
+        started = time.monotonic()
+        done = 0
+        with requests.Session() as session:
+            for base_url in base_urls:
+                for url in urls:
+                    done += self.fetch(
+                        session, base_url.rstrip('/') + url,
+                        options['timeout'],
+                    )
+        total = len(urls) * len(base_urls)
+        self.stdout.write(
+            f'Прогрето страниц: {done} из {total} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
+        if done == total:
+            cache.set(caches_primed_key(), True, None)
+        else:
+            self.stderr.write('Кэши не отмечены прогретыми.')
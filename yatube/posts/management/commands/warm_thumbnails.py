@@ -0,0 +1,94 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import render_thumbnails, save_kvstore_entries
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее создаёт миниатюры картинок постов в пуле процессов, '
+        'чтобы их не генерировали живые запросы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help='Число процессов; 1 — без пула, в текущем процессе.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=20,
+            help='Сколько картинок отдавать процессу за раз.'
+        )
+        parser.add_argument(
+            '--after', type=int, default=0,
+            help='Начать с постов, pk которых больше указанного.'
+        )
+        parser.add_argument(
+            '--state-file',
+            help='Файл с последним обработанным pk для продолжения работы.'
+        )
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='Не больше стольких картинок в секунду (0 — без лимита).'
+        )
+
+    def handle(self, *args, **options):
+        after = options['after']
+        state_file = options['state_file']
+        if state_file and os.path.exists(state_file):
+            with open(state_file) as state:
+                after = max(after, int(state.read().strip() or 0))
+        processes = max(options['processes'], 1)
+        chunk_size = options['chunk_size']
+        pool = None
+        if processes > 1:
+            # Воркеры не должны унаследовать открытые соединения с БД.
+            connections.close_all()
+            pool = Pool(processes)
+        total = created = 0
+        try:
+            while True:
+                started = time.monotonic()
+                rows = list(
+                    Post.objects.exclude(image='')
+                    .filter(pk__gt=after)
+                    .order_by('pk')
+                    .values_list('pk', 'image')[:chunk_size * processes]
+                )
+                if not rows:
+                    break
+                names = [name for _, name in rows]
+                chunks = [
+                    names[i:i + chunk_size]
+                    for i in range(0, len(names), chunk_size)
+                ]
+                if pool is None:
+                    results = map(render_thumbnails, chunks)
+                else:
+                    results = pool.map(render_thumbnails, chunks)
+                entries = {}
+                for written, count in results:
+                    entries.update(written)
+                    created += count
+                save_kvstore_entries(entries)
+                after = rows[-1][0]
+                total += len(rows)
+                if state_file:
+                    with open(state_file, 'w') as state:
+                        state.write(str(after))
+                if options['rate']:
+                    delay = len(rows) / options['rate']
+                    time.sleep(max(delay - (time.monotonic() - started), 0))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        self.stdout.write(
+            f'Картинок обработано: {total}, создано миниатюр для: {created}, '
+            f'последний pk: {after}'
+        )
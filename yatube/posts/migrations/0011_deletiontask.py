@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_archivedpost_archivedcomment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата публикации')),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Задача удаления',
+                'verbose_name_plural': 'Задачи удаления',
+                'ordering': ['created'],
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_excerpt_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий к посту'), ('group', 'Группа'), ('user', 'Пользователь')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Изменение страниц',
+                'verbose_name_plural': 'Изменения страниц',
+            },
+        ),
+    ]
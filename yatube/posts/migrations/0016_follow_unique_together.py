@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:51
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_page_change'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='follow',
+            unique_together={('user', 'author')},
+        ),
+    ]
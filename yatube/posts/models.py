@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 
 from core.models import CreatedModel
+from .excerpts import make_excerpt
 
 User = get_user_model()
 
@@ -15,7 +16,32 @@ class Group(models.Model):
         return self.title
 
 
-class Post(CreatedModel):
+class ImageMetadataModel(models.Model):
+    """
+    Абстрактная модель. Хранит сведения о картинке поста,
+    чтобы не открывать файл ради размеров или формата.
+    """
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_size = models.PositiveIntegerField(null=True, blank=True)
+    image_format = models.CharField(max_length=10, blank=True)
+    image_hash = models.CharField(max_length=64, blank=True)
+    image_placeholder = models.TextField(blank=True)
+
+    IMAGE_METADATA_FIELDS = (
+        'image_width',
+        'image_height',
+        'image_size',
+        'image_format',
+        'image_hash',
+        'image_placeholder',
+    )
+
+    class Meta:
+        abstract = True
+
+
+class Post(CreatedModel, ImageMetadataModel):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Введите текст поста'
@@ -41,6 +67,9 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    # Готовый HTML начала текста для карточек, чтобы списки
+    # не читали и не обрабатывали весь text.
+    excerpt_html = models.TextField(blank=True, editable=False)
 
     class Meta:
         ordering = ['-created']
@@ -50,6 +79,14 @@ class Post(CreatedModel):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt_html = make_excerpt(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt_html'}
+        super().save(*args, **kwargs)
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -85,3 +122,110 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ['user', 'author']
+
+
+class ArchivedPost(ImageMetadataModel):
+    """Архивная копия поста, перенесённая командой archive_posts."""
+    text = models.TextField(verbose_name='Текст поста')
+    excerpt_html = models.TextField(blank=True, editable=False)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата публикации',
+        db_index=True
+    )
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+    )
+    text = models.TextField(verbose_name='Комментарий')
+    created = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ['-created']
+
+
+class DeletionTask(CreatedModel):
+    """Отложенное удаление пользователя или группы небольшими пачками."""
+    USER = 'user'
+    GROUP = 'group'
+    KIND_CHOICES = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created']
+        unique_together = ['kind', 'object_id']
+        verbose_name = 'Задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}: {self.processed}/{self.total}'
+
+
+class PageChange(models.Model):
+    """
+    Журнал изменений для выгрузки статических страниц: какие посты,
+    группы и пользователи менялись с прошлого запуска export_pages.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    GROUP = 'group'
+    USER = 'user'
+    KIND_CHOICES = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий к посту'),
+        (GROUP, 'Группа'),
+        (USER, 'Пользователь'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = 'Изменение страниц'
+        verbose_name_plural = 'Изменения страниц'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
@@ -0,0 +1,32 @@
+"""Пространства имён кэша для лент постов (см. core.pagecache)."""
+FEED = 'feed'
+# Страницы постов: на них виден счётчик постов автора.
+DETAILS = 'details'
+
+
+def author_namespace(username):
+    return f'author:{username}'
+
+
+def group_namespace(slug):
+    return f'group:{slug}'
+
+
+def post_namespace(post_id):
+    return f'post:{post_id}'
+
+
+def feed_namespaces():
+    return [FEED]
+
+
+def group_namespaces(slug):
+    return [group_namespace(slug)]
+
+
+def profile_namespaces(username):
+    return [author_namespace(username)]
+
+
+def detail_namespaces(post_id):
+    return [DETAILS, post_namespace(post_id)]
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+
+from core.pagecache import SITE, bump
+
+from .models import (ArchivedComment, ArchivedPost, Comment, DeletionTask,
+                     Group, PageChange, Post, User)
+from .namespaces import (DETAILS, FEED, author_namespace, group_namespace,
+                         post_namespace)
+
+# Модели, от которых зависят публичные страницы.
+PUBLIC_MODELS = (
+    ArchivedComment, ArchivedPost, Comment, DeletionTask, Group, Post, User,
+)
+# Служебные поля: их изменение не видно на страницах.
+IGNORED_FIELDS = {'last_login', 'processed'}
+
+
+def journal_entry(instance):
+    """(вид, id) записи журнала PageChange для изменённого объекта."""
+    if isinstance(instance, (Post, ArchivedPost)):
+        return PageChange.POST, instance.pk
+    if isinstance(instance, (Comment, ArchivedComment)):
+        return PageChange.COMMENT, instance.post_id
+    if isinstance(instance, Group):
+        return PageChange.GROUP, instance.pk
+    if isinstance(instance, DeletionTask):
+        return instance.kind, instance.object_id
+    return PageChange.USER, instance.pk
+
+
+def related_value(instance, name, attr, previous_id, previous_value):
+    """
+    Поле attr связанного объекта name. Без запроса, если объект не
+    сменился с прошлой записи в базу или уже загружен.
+    """
+    field = instance._meta.get_field(name)
+    related_id = getattr(instance, field.attname)
+    if related_id is None:
+        return None
+    if related_id == previous_id:
+        return previous_value
+    related = field.get_cached_value(instance, None)
+    if related is None or related.pk != related_id:
+        related = getattr(instance, name)
+    return getattr(related, attr)
+
+
+def changed_namespaces(instance, count_changed):
+    """Пространства имён кэша, страницы которых изменил instance."""
+    if isinstance(instance, (Comment, ArchivedComment)):
+        return [post_namespace(instance.post_id)]
+    if not isinstance(instance, (Post, ArchivedPost)):
+        return [SITE]
+    previous = getattr(instance, '_previous_relations', None)
+    author_id, author, group_id, group = previous or (None,) * 4
+    username = related_value(instance, 'author', 'username', author_id, author)
+    slug = related_value(instance, 'group', 'slug', group_id, group)
+    namespaces = [
+        FEED, post_namespace(instance.pk), author_namespace(username),
+    ]
+    if slug:
+        namespaces.append(group_namespace(slug))
+    if author and author != username:
+        namespaces.append(author_namespace(author))
+    if group and group != slug:
+        namespaces.append(group_namespace(group))
+    if count_changed:
+        namespaces.append(DETAILS)
+    return namespaces
+
+
+def remember_relations(sender, instance, raw=False, **kwargs):
+    """
+    Одним запросом запоминает автора и группу поста, какие сейчас
+    в базе: по ним сбрасываются и прежние ленты, а changed_namespaces
+    не загружает связанные объекты.
+    """
+    if raw or instance.pk is None:
+        return
+    instance._previous_relations = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list(
+            'author_id', 'author__username', 'group_id', 'group__slug'
+        )
+        .first()
+    )
+
+
+def public_object_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= IGNORED_FIELDS:
+        return
+    count_changed = (
+        kwargs['signal'] is post_delete or kwargs.get('created', False)
+    )
+    bump(*changed_namespaces(instance, count_changed))
+    if settings.STATIC_EXPORT_JOURNAL:
+        kind, object_id = journal_entry(instance)
+        PageChange.objects.create(kind=kind, object_id=object_id)
+
+
+for model in (Post, ArchivedPost):
+    pre_save.connect(remember_relations, sender=model)
+    pre_delete.connect(remember_relations, sender=model)
+for model in PUBLIC_MODELS:
+    post_save.connect(public_object_changed, sender=model)
+    post_delete.connect(public_object_changed, sender=model)
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+
+from .templatetags.post_cards import PostListRenderer
+from .thumbnails import prefetch_thumbnails
+
+STREAM_MARKER = '<!--post-stream-->'
+# Сколько постов читается из курсора и выводится за раз.
+STREAM_CHUNK_SIZE = 5
+
+
+def iter_chunks(posts, size):
+    """Посты пачками; у QuerySet — через курсор, без списка целиком."""
+    if isinstance(posts, QuerySet):
+        posts = posts.iterator(chunk_size=size)
+    chunk = []
+    for post in posts:
+        chunk.append(post)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_cards(request, posts):
+    match = request.resolver_match
+    renderer = PostListRenderer(match.view_name if match else '')
+    separator = ''
+    for chunk in iter_chunks(posts, STREAM_CHUNK_SIZE):
+        prefetch_thumbnails(chunk)
+        parts = []
+        for post in chunk:
+            parts.append(separator + renderer.render_card(post))
+            separator = '<hr>'
+        yield ''.join(parts)
+
+
+def render_post_list(request, template_name, context):
+    """
+    Страница со списком постов context['page_obj']. При
+    STREAM_POST_LISTS всё до карточек отправляется сразу, карточки —
+    по мере чтения курсора, затем остаток страницы. Курсор читается
+    под дедлайном запроса (QueryDeadlineMiddleware). Потоковый ответ
+    не кэшируется cache_page_stale.
+    """
+    page_obj = context['page_obj']
+    if settings.STREAM_POST_LISTS:
+        html = render_to_string(
+            template_name, dict(context, stream_marker=STREAM_MARKER), request
+        )
+        head, marker, tail = html.partition(STREAM_MARKER)
+        if marker:
+            def content():
+                yield head
+                yield from stream_cards(request, page_obj.object_list)
+                yield tail
+            return StreamingHttpResponse(content())
+    prefetch_thumbnails(page_obj)
+    return render(request, template_name, context)
@@ -0,0 +1,174 @@
+import logging
+from urllib.parse import quote
+
+from django import template
+from django.urls import reverse
+from django.utils.formats import date_format
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.safestring import mark_safe
+from django.utils.timezone import template_localtime
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from ..deletion import pending_ids
+from ..excerpts import make_excerpt
+from ..models import DeletionTask
+from ..thumbnails import CARD_GEOMETRY, CARD_OPTIONS
+
+logger = logging.getLogger(__name__)
+register = template.Library()
+
+# Аргумент, с которым reverse() вызывается один раз на маршрут.
+# Из цифр, чтобы подходить конвертерам int, slug и str.
+URL_PLACEHOLDER = '9876543210'
+
+
+def size_attrs(image):
+    if not image.size:
+        return ''
+    return format_html(' width="{}" height="{}"', image.width, image.height)
+
+
+class PostListRenderer:
+    """
+    Разметка карточки поста для списков: тег post_card, шаблоны Jinja2
+    и потоковая отдача. Проверки текущей страницы выполняются один раз
+    на список, reverse() вызывается один раз на маршрут, даты
+    кэшируются, а HTML собирается без узлов шаблона.
+    """
+
+    def __init__(self, view_name=''):
+        self.show_author = view_name != 'posts:profile'
+        self.show_group = view_name != 'posts:group_list'
+        self.routes = {}
+        self.dates = {}
+
+    def url(self, name, arg):
+        """
+        Ссылка маршрута name с аргументом arg. reverse() вызывается
+        один раз на маршрут, с URL_PLACEHOLDER вместо аргумента.
+        """
+        if name not in self.routes:
+            url = reverse(name, args=[URL_PLACEHOLDER])
+            self.routes[name] = url.split(URL_PLACEHOLDER, 1)
+        prefix, suffix = self.routes[name]
+        arg = quote(str(arg), safe=RFC3986_SUBDELIMS + '/~:@')
+        return format_html('{}{}{}', prefix, arg, suffix)
+
+    @cached_property
+    def hidden_groups(self):
+        """Группы в очереди на удаление: их строка в карточке не выводится."""
+        return set(
+            pending_ids(DeletionTask.GROUP)
+            .values_list('object_id', flat=True)
+        )
+
+    def date(self, value):
+        value = template_localtime(value)
+        key = value.date()
+        if key not in self.dates:
+            self.dates[key] = date_format(value, 'd E Y')
+        return self.dates[key]
+
+    def render_card(self, post):
+        author = group = ''
+        if self.show_author:
+            author = format_html(
+                '<li>Автор: <a href="{}">{}</a></li>',
+                self.url('posts:profile', post.author.username),
+                post.author.get_full_name(),
+            )
+        if (
+            self.show_group and post.group_id
+            and post.group_id not in self.hidden_groups
+        ):
+            group = format_html(
+                '<li>Группа: <a href="{}">{}</a></li>',
+                self.url('posts:group_list', post.group.slug),
+                post.group.title,
+            )
+        # excerpt_html хранит уже экранированный HTML.
+        excerpt = mark_safe(post.excerpt_html or make_excerpt(post.text))
+        return format_html(
+            '<article><ul>{}<li>Дата публикации: {}</li>{}</ul>{}'
+            '<p>{} <a href="{}">подробная инфомация</a></p></article>',
+            author, self.date(post.created), group, self.render_image(post),
+            excerpt, self.url('posts:post_detail', post.pk),
+        )
+
+    def render_image(self, post):
+        thumbnail = getattr(post, 'thumbnail', None)
+        if not thumbnail:
+            return self.render_fallback_image(post)
+        source = style = ''
+        if getattr(post, 'thumbnail_srcset', ''):
+            source = format_html(
+                '<source type="{}" srcset="{}" '
+                'sizes="(min-width: 992px) 960px, 100vw">',
+                post.thumbnail_type, post.thumbnail_srcset,
+            )
+        if post.image_placeholder:
+            style = format_html(
+                ' style="background: url(\'{}\') center / cover no-repeat"',
+                post.image_placeholder,
+            )
+        return format_html(
+            '<picture>{}<img class="card-img my-2" src="{}" '
+            'loading="lazy"{}{}></picture>',
+            source, thumbnail.url, style, size_attrs(thumbnail),
+        )
+
+    def render_fallback_image(self, post):
+        """Миниатюра без prefetch_thumbnails, как тег {% thumbnail %}."""
+        if not post.image:
+            return ''
+        try:
+            image = get_thumbnail(post.image, CARD_GEOMETRY, **CARD_OPTIONS)
+        except Exception:
+            if thumbnail_settings.THUMBNAIL_DEBUG:
+                raise
+            logger.exception('Thumbnail failed for %s', post.image)
+            return ''
+        return format_html(
+            '<img class="card-img my-2" src="{}" loading="lazy"{}>',
+            image.url, size_attrs(image),
+        )
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """
+    Карточка поста для цикла по странице. Рендерер создаётся
+    один раз на отрисовку шаблона и хранится в render_context.
+    """
+    renderer = context.render_context.get(PostListRenderer)
+    if renderer is None:
+        match = getattr(context.get('request'), 'resolver_match', None)
+        renderer = PostListRenderer(match.view_name if match else '')
+        context.render_context[PostListRenderer] = renderer
+    return renderer.render_card(post)
+
+
+class StreamableNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        marker = context.get('stream_marker')
+        if marker:
+            return marker
+        return self.nodelist.render(context)
+
+
+@register.tag
+def streamable(parser, token):
+    """
+    {% streamable %}...{% endstreamable %} — место списка карточек.
+    При потоковой отдаче вместо содержимого выводится stream_marker,
+    а карточки подставляет posts.streaming.
+    """
+    nodelist = parser.parse(('endstreamable',))
+    parser.delete_first_token()
+    return StreamableNode(nodelist)
@@ -0,0 +1,73 @@
+import datetime as dt
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ArchivedComment, ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Тестовый пост {i + 1}')
+            for i in range(15)
+        )
+        old_ids = list(
+            Post.objects.order_by('pk').values_list('pk', flat=True)[:8]
+        )
+        for days, pk in enumerate(old_ids):
+            Post.objects.filter(pk=pk).update(
+                created=timezone.now() - dt.timedelta(days=500 + days)
+            )
+        cls.old_post = Post.objects.get(pk=old_ids[0])
+        Comment.objects.create(
+            post=cls.old_post, author=cls.user, text='Тестовый комментарий'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        call_command(
+            'archive_posts', days=365, batch_size=3, stdout=StringIO()
+        )
+
+    def test_old_posts_moved_to_archive(self):
+        """Старые посты и комментарии переносятся в архив."""
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertEqual(ArchivedPost.objects.count(), 8)
+        self.assertFalse(Comment.objects.exists())
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.created, self.old_post.created)
+        self.assertEqual(
+            ArchivedComment.objects.get().post, archived
+        )
+
+    def test_post_detail_reads_archive(self):
+        """Архивный пост доступен по прежнему адресу."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.old_post.pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_archived'])
+        self.assertEqual(len(response.context['comments']), 1)
+
+    def test_profile_paginates_into_archive(self):
+        """Профиль без пропусков продолжается архивными постами."""
+        url = reverse('posts:profile', kwargs={'username': 'test_user'})
+        seen = []
+        for page in (1, 2):
+            response = self.client.get(url, {'page': page})
+            seen += list(response.context['page_obj'])
+        self.assertEqual(len(seen), 15)
+        self.assertEqual(len({post.pk for post in seen}), 15)
+        dates = [post.created for post in seen]
+        self.assertEqual(dates, sorted(dates, reverse=True))
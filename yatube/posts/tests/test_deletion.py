@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..deletion import schedule_deletion
+from ..models import Comment, DeletionTask, Follow, Group, Post
+from .utils import uploaded_gif
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DeletionTests(TransactionTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        self.post = Post.objects.create(
+            author=self.author,
+            group=self.group,
+            text='Пост с картинкой',
+            image=uploaded_gif(),
+        )
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=f'Пост {i}')
+            for i in range(5)
+        )
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+
+    def test_scheduled_user_hidden_immediately(self):
+        """Пользователь в очереди на удаление сразу скрыт со страниц."""
+        schedule_deletion(self.author)
+        profile = reverse('posts:profile', kwargs={'username': 'author'})
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertEqual(self.client.get(profile).status_code, 404)
+        self.assertEqual(self.client.get(detail).status_code, 404)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+        self.assertTrue(User.objects.filter(username='author').exists())
+
+    def test_scheduled_user_deactivated(self):
+        """Пользователь в очереди не входит на сайт и не получает подписок."""
+        author_client = Client()
+        author_client.force_login(self.author)
+        schedule_deletion(self.author)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        response = author_client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
+        Follow.objects.all().delete()
+        self.client.force_login(self.reader)
+        follow = reverse('posts:profile_follow', kwargs={'username': 'author'})
+        self.assertEqual(self.client.get(follow).status_code, 404)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_scheduled_group_hidden_from_posts(self):
+        """Группа в очереди на удаление не выводится у её постов."""
+        schedule_deletion(self.group)
+        group_url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.client.get(page)
+                self.assertContains(response, 'Пост с картинкой')
+                self.assertNotContains(response, group_url)
+
+    def test_user_deleted_in_batches(self):
+        """Команда удаляет пользователя пачками вместе с картинками."""
+        image_path = self.post.image.path
+        task = schedule_deletion(self.author)
+        self.assertEqual(task.total, 7)
+        call_command(
+            'process_deletions', batch_size=2, pause=0, stdout=StringIO()
+        )
+        task.refresh_from_db()
+        self.assertIsNotNone(task.finished)
+        self.assertEqual(task.processed, task.total)
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(os.path.exists(image_path))
+
+    def test_group_deleted_in_batches(self):
+        """Посты удаляемой группы остаются без группы."""
+        task = schedule_deletion(self.group)
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        call_command(
+            'process_deletions', batch_size=2, pause=0, stdout=StringIO()
+        )
+        task.refresh_from_db()
+        self.assertEqual(task.processed, 6)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+        self.assertFalse(DeletionTask.objects.filter(finished=None).exists())
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..export import MANIFEST_NAME, export_pages, page_file
+from ..models import Group, PageChange, Post
+
+User = get_user_model()
+
+
+@override_settings(STATIC_EXPORT_JOURNAL=True)
+class ExportPagesTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='first', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='second', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.get(pk=self.post.pk)
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+
+    def read(self, url):
+        with open(os.path.join(self.output, page_file(url))) as file:
+            return file.read()
+
+    def manifest(self):
+        with open(os.path.join(self.output, MANIFEST_NAME)) as file:
+            return json.load(file)
+
+    def test_page_file(self):
+        self.assertEqual(page_file('/group/first/'), 'group/first/index.html')
+        self.assertEqual(
+            page_file('/profile/author/?page=3'), 'profile/author/page-3.html'
+        )
+
+    def test_full_export(self):
+        written, _ = export_pages(self.output)
+        pages = self.manifest()['pages']
+        urls = (
+            '/group/first/',
+            '/group/second/',
+            '/profile/author/',
+            f'/posts/{self.post.pk}/',
+        )
+        self.assertEqual(written, len(urls))
+        self.assertEqual(set(pages), set(urls))
+        self.assertIn('Первый пост', self.read('/group/first/'))
+        self.assertNotIn('Выйти', self.read('/profile/author/'))
+        self.assertFalse(PageChange.objects.exists())
+
+    def test_incremental_export_renders_changed_scopes(self):
+        """Смена группы поста перерисовывает обе группы, автора и пост."""
+        export_pages(self.output)
+        self.post.group = self.other_group
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        written, _ = export_pages(self.output)
+        self.assertEqual(written, 4)
+        self.assertNotIn('Исправленный пост', self.read('/group/first/'))
+        self.assertIn('Исправленный пост', self.read('/group/second/'))
+        self.assertEqual(export_pages(self.output), (0, 0))
+
+    def test_without_journal_every_export_is_full(self):
+        """Без журнала изменения не записываются, выгрузка полная."""
+        export_pages(self.output)
+        with self.settings(STATIC_EXPORT_JOURNAL=False):
+            self.post.text = 'Исправленный пост'
+            self.post.save()
+            self.assertFalse(PageChange.objects.exists())
+            self.assertEqual(export_pages(self.output), (4, 0))
+        self.assertEqual(export_pages(self.output), (4, 0))
+        self.assertEqual(export_pages(self.output), (0, 0))
+
+    def test_comment_renders_only_post(self):
+        export_pages(self.output)
+        self.post.comments.create(author=self.author, text='Комментарий')
+        self.assertEqual(export_pages(self.output), (1, 0))
+        self.assertIn('Комментарий', self.read(f'/posts/{self.post.pk}/'))
+
+    def test_deleted_post_removed(self):
+        export_pages(self.output)
+        url = f'/posts/{self.post.pk}/'
+        self.post.delete()
+        _, removed = export_pages(self.output)
+        self.assertEqual(removed, 2)
+        manifest = self.manifest()
+        self.assertNotIn(url, manifest['pages'])
+        self.assertNotIn('/profile/author/', manifest['pages'])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.output, page_file(url)))
+        )
+
+    def test_pagination(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=f'Пост {number}')
+            for number in range(10)
+        )
+        export_pages(self.output, full=True)
+        pages = self.manifest()['pages']
+        self.assertEqual(
+            pages['/group/first/?page=2'], 'group/first/page-2.html'
+        )
+        self.assertIn('/profile/author/?page=2', pages)
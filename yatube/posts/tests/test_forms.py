@@ -1,13 +1,17 @@
+import hashlib
 import shutil
 import tempfile
+from io import StringIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Group, Post, Comment
+from .utils import SMALL_GIF, process_images_now, uploaded_gif
 
 User = get_user_model()
 
@@ -48,19 +52,7 @@ class PostsFormsTests(TestCase):
         """Валидная форма создает запись в Post."""
         posts_count = Post.objects.count()
 
-        small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x02\x00'
-            b'\x01\x00\x80\x00\x00\x00\x00\x00'
-            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
-            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
-            b'\x0A\x00\x3B'
-        )
-        uploaded = SimpleUploadedFile(
-            name='small.gif',
-            content=small_gif,
-            content_type='image/gif'
-        )
+        uploaded = uploaded_gif()
 
         form_data = {
             'text': TEST_POST_TEXT,
@@ -68,11 +60,12 @@ class PostsFormsTests(TestCase):
             'image': uploaded,
         }
 
-        response = self.auth_client.post(
-            reverse('posts:post_create'),
-            data=form_data,
-            follow=True
-        )
+        with process_images_now():
+            response = self.auth_client.post(
+                reverse('posts:post_create'),
+                data=form_data,
+                follow=True
+            )
 
         self.assertRedirects(
             response,
@@ -87,6 +80,34 @@ class PostsFormsTests(TestCase):
                 image='posts/small.gif',
             ).exists()
         )
+        post = Post.objects.get(image='posts/small.gif')
+        post_metadata = {
+            'image_width': 2,
+            'image_height': 1,
+            'image_size': len(SMALL_GIF),
+            'image_format': 'GIF',
+            'image_hash': hashlib.sha256(SMALL_GIF).hexdigest(),
+        }
+        for field, expected in post_metadata.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(post, field), expected)
+        # Заглушку создаёт фоновая обработка сразу после сохранения.
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+
+    def test_posts_backfill_image_metadata(self):
+        """Команда заполняет метаданные картинок существующих постов."""
+        post = Post.objects.create(
+            author=self.user,
+            text=TEST_POST_TEXT,
+            image=uploaded_gif('backfill.gif'),
+        )
+        self.assertEqual(post.image_hash, '')
+        call_command('backfill_image_metadata', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_format, 'GIF')
 
     def test_posts_edit_post(self):
         """Валидная форма редактирует запись в Post."""
@@ -144,6 +165,35 @@ class PostsFormsTests(TestCase):
             'поврежден или не является изображением.'
         )
 
+    @override_settings(POST_IMAGE_MAX_SIDE=1)
+    def test_posts_image_too_large(self):
+        """Картинка больше допустимых размеров отклоняется по заголовку."""
+        posts_count = Post.objects.count()
+        uploaded = uploaded_gif('large.gif')
+        response = self.auth_client.post(
+            reverse('posts:post_create'),
+            data={'text': TEST_POST_TEXT, 'image': uploaded},
+        )
+        self.assertFormError(
+            response,
+            'form',
+            'image',
+            'Слишком большое изображение: 2x1. '
+            'Максимум 1 точек по стороне.'
+        )
+        self.assertEqual(Post.objects.count(), posts_count)
+
+    def test_posts_create_checks_csrf(self):
+        """Форма поста с загрузками по-прежнему проверяет CSRF."""
+        posts_count = Post.objects.count()
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'), data={'text': TEST_POST_TEXT}
+        )
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertEqual(Post.objects.count(), posts_count)
+
     def test_posts_comments_by_auth_client(self):
         """Только авторизованный пользователь может оставлять комментарии."""
         comments_count = Comment.objects.count()
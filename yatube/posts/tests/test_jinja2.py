@@ -0,0 +1,88 @@
+import os
+import re
+import tempfile
+import unittest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from ..models import Comment, Group, Post
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+User = get_user_model()
+
+
+def normalize(html):
+    html = re.sub(r'name="csrfmiddlewaretoken" value="[^"]*"', '', html)
+    html = re.sub(r'\s+', ' ', html)
+    return re.sub(r'\s*([<>])\s*', r'\1', html).strip()
+
+
+@unittest.skipIf(jinja2 is None, 'нужен пакет jinja2')
+class Jinja2TemplatesTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='author', first_name='Имя', last_name='<Фамилия>'
+        )
+        cls.group = Group.objects.create(
+            title='Группа & Ко', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Текст\n<b>поста</b>'
+        )
+        Post.objects.create(author=cls.user, text='Пост без группы')
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get(self, url, templates):
+        cache.clear()
+        with override_settings(TEMPLATES=templates):
+            return self.client.get(url).content.decode()
+
+    def test_same_html_as_django_templates(self):
+        """Шаблоны Jinja2 выводят ту же разметку, что шаблоны Django."""
+        django = settings.TEMPLATES
+        both = [settings.JINJA2_TEMPLATES] + django
+        urls = (
+            '/',
+            '/follow/',
+            f'/group/{self.group.slug}/',
+            f'/profile/{self.user.username}/',
+            f'/posts/{self.post.pk}/',
+            '/create/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    normalize(self.get(url, both)),
+                    normalize(self.get(url, django)),
+                )
+
+    def test_bytecode_cache_dir_must_be_private(self):
+        """Каталог кэша байт-кода, открытый другим, не используется."""
+        from core.jinja2 import bytecode_cache
+        with tempfile.TemporaryDirectory() as root:
+            private = os.path.join(root, 'private')
+            with self.settings(JINJA2_BYTECODE_CACHE_DIR=private):
+                bytecode_cache()
+            self.assertEqual(os.stat(private).st_mode & 0o777, 0o700)
+            shared = os.path.join(root, 'shared')
+            os.mkdir(shared)
+            os.chmod(shared, 0o777)
+            with self.settings(JINJA2_BYTECODE_CACHE_DIR=shared):
+                with self.assertRaises(ImproperlyConfigured):
+                    bytecode_cache()
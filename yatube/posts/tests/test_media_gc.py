@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail.models import KVStore
+
+from ..models import Post
+from ..thumbnails import prefetch_thumbnails
+from .utils import SMALL_GIF, uploaded_gif
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        user = User.objects.create_user(username='test_user')
+        self.post = Post.objects.create(
+            author=user,
+            text='Тестовый пост',
+            image=uploaded_gif('old.gif'),
+        )
+        prefetch_thumbnails([self.post])
+        self.old_image = self.post.image.path
+        self.old_thumbnail = self.post.thumbnail.storage.path(
+            self.post.thumbnail.name
+        )
+        self.post.image = uploaded_gif('new.gif')
+        self.post.save()
+        prefetch_thumbnails([self.post])
+        self.orphan = os.path.join(TEMP_MEDIA_ROOT, 'cache', 'orphan.jpg')
+        with open(self.orphan, 'wb') as orphan:
+            orphan.write(SMALL_GIF)
+
+    def gc(self, **options):
+        out = StringIO()
+        call_command('gc_media', min_age=0, pause=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_dry_run_deletes_nothing(self):
+        """Пробный запуск только сообщает о мусоре."""
+        output = self.gc(dry_run=True)
+        self.assertIn('Картинки без постов: найдено 1', output)
+        self.assertIn('Миниатюры без записей: найдено 2', output)
+        for path in (self.old_image, self.old_thumbnail, self.orphan):
+            with self.subTest(path=path):
+                self.assertTrue(os.path.exists(path))
+
+    def test_dry_run_matches_real_run(self):
+        """Пробный запуск сообщает то же, что удалит настоящий."""
+        planned = self.gc(dry_run=True)
+        self.assertEqual(planned.replace('найдено', 'удалено'), self.gc())
+
+    def test_unreferenced_media_deleted(self):
+        """Удаляются старая картинка, её миниатюры и файлы без записей."""
+        kv_count = KVStore.objects.count()
+        output = self.gc()
+        self.assertIn('Устаревшие записи sorl: удалено 1', output)
+        for path in (self.old_image, self.old_thumbnail, self.orphan):
+            with self.subTest(path=path):
+                self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(self.post.image.path))
+        self.assertTrue(os.path.exists(self.post.thumbnail.storage.path(
+            self.post.thumbnail.name
+        )))
+        self.assertEqual(KVStore.objects.count(), kv_count - 3)
@@ -1,6 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
+from ..excerpts import make_excerpt
 from ..models import Group, Post
 
 User = get_user_model()
@@ -62,3 +66,23 @@ class PostsModelTests(TestCase):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_help_text
                 )
+
+    def test_post_excerpt_html(self):
+        """Начало текста для карточки обновляется при сохранении поста."""
+        post = Post.objects.create(
+            author=PostsModelTests.user,
+            text='<b>' + 'а' * 300 + '\nконец',
+        )
+        self.assertTrue(post.excerpt_html.startswith('<p>&lt;b&gt;'))
+        self.assertNotIn('конец', post.excerpt_html)
+        post.text = 'Короткий\nтекст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt_html, '<p>Короткий<br>текст</p>')
+
+    def test_backfill_excerpts(self):
+        """Команда backfill_excerpts заполняет пустые excerpt_html."""
+        Post.objects.update(excerpt_html='')
+        call_command('backfill_excerpts', stdout=StringIO())
+        post = Post.objects.get(pk=PostsModelTests.post.pk)
+        self.assertEqual(post.excerpt_html, make_excerpt(post.text))
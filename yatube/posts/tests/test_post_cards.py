@@ -0,0 +1,116 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve
+
+from ..models import Group, Post
+from ..templatetags import post_cards
+from ..thumbnails import prefetch_thumbnails
+from .utils import uploaded_gif
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+POST_CARD_LOOP = Template(
+    "{% load post_cards %}"
+    "{% for post in posts %}"
+    "{% post_card post %}"
+    "{% if not forloop.last %}<hr>{% endif %}"
+    "{% endfor %}"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostCardTagTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='test.user', first_name='Иван', last_name='<Петров>'
+        )
+        cls.group = Group.objects.create(
+            title='Группа & Ко', slug='test-slug', description='Описание'
+        )
+        Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Пост с картинкой\n' + 'текст ' * 50,
+            image=uploaded_gif(),
+            image_placeholder='data:image/jpeg;base64,AAA=',
+        )
+        Post.objects.create(author=cls.user, text='<script>без группы')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def render(self, path, prefetch):
+        request = RequestFactory().get(path)
+        request.resolver_match = resolve(path)
+        posts = list(Post.objects.all())
+        if prefetch:
+            prefetch_thumbnails(posts)
+            post = next(post for post in posts if post.image)
+            post.thumbnail_srcset = 'a.webp 480w, b&c.webp 960w'
+            post.thumbnail_type = 'image/webp'
+        return POST_CARD_LOOP.render(
+            Context({'posts': posts, 'request': request})
+        )
+
+    def test_author_and_group_hidden_on_own_pages(self):
+        """На странице автора и группы их ссылки в карточке не выводятся."""
+        cases = (
+            ('/', True, True),
+            ('/profile/test.user/', False, True),
+            ('/group/test-slug/', True, False),
+        )
+        for path, author, group in cases:
+            with self.subTest(path=path):
+                rendered = self.render(path, True)
+                self.assertEqual('Автор:' in rendered, author)
+                self.assertEqual('Группа:' in rendered, group)
+
+    def test_image_markup(self):
+        """Картинка выводится с srcset и заглушкой или без prefetch."""
+        rendered = self.render('/', True)
+        self.assertIn(
+            '<source type="image/webp" '
+            'srcset="a.webp 480w, b&amp;c.webp 960w" '
+            'sizes="(min-width: 992px) 960px, 100vw">',
+            rendered,
+        )
+        self.assertIn(
+            'style="background: url(\'data:image/jpeg;base64,AAA=\') '
+            'center / cover no-repeat"',
+            rendered,
+        )
+        self.assertIn('width="960" height="339"', rendered)
+        rendered = self.render('/', False)
+        self.assertNotIn('<picture>', rendered)
+        self.assertEqual(rendered.count('<img class="card-img my-2"'), 1)
+
+    def test_urls_and_escaping(self):
+        rendered = self.render('/', True)
+        self.assertIn('href="/profile/test.user/"', rendered)
+        self.assertIn('href="/group/test-slug/"', rendered)
+        for post in Post.objects.all():
+            self.assertIn(f'href="/posts/{post.pk}/"', rendered)
+        self.assertIn('Группа &amp; Ко', rendered)
+        self.assertIn('&lt;Петров&gt;', rendered)
+        self.assertIn('&lt;script&gt;', rendered)
+        self.assertEqual(rendered.count('<hr>'), 1)
+
+    def test_routes_reversed_once_per_list(self):
+        """reverse() вызывается один раз на маршрут, а не на карточку."""
+        Post.objects.create(author=self.user, group=self.group, text='Ещё')
+        with mock.patch.object(
+            post_cards, 'reverse', wraps=post_cards.reverse
+        ) as reverse:
+            self.render('/', True)
+        self.assertEqual(reverse.call_count, 3)
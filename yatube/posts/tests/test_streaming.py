@@ -0,0 +1,86 @@
+import re
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.middleware import deadline_stats
+from ..models import Follow, Group, Post
+from ..streaming import STREAM_CHUNK_SIZE
+
+User = get_user_model()
+
+
+def normalize(html):
+    html = re.sub(r'\s+', ' ', html)
+    return re.sub(r'\s*([<>])\s*', r'\1', html).strip()
+
+
+class StreamingListTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='<Фамилия>'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(STREAM_CHUNK_SIZE * 2 + 1)
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.urls = (
+            '/',
+            '/follow/',
+            f'/group/{cls.group.slug}/',
+            f'/profile/{cls.author.username}/',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_streamed_page_matches_rendered(self):
+        """Потоковая страница совпадает с обычной."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                expected = self.client.get(url)
+                cache.clear()
+                with override_settings(STREAM_POST_LISTS=True):
+                    response = self.client.get(url)
+                self.assertFalse(expected.streaming)
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                self.assertEqual(
+                    normalize(content), normalize(expected.content.decode())
+                )
+
+    @override_settings(STREAM_POST_LISTS=True)
+    def test_head_sent_before_cards(self):
+        """Первая порция — страница до списка, без карточек."""
+        response = self.client.get(f'/group/{self.group.slug}/')
+        chunks = iter(response.streaming_content)
+        head = next(chunks).decode()
+        self.assertIn('<h1>Группа</h1>', head)
+        self.assertNotIn('Пост ', head)
+        rest = b''.join(chunks).decode()
+        self.assertIn(f'Пост {STREAM_CHUNK_SIZE * 2}', rest)
+        self.assertNotIn('post-stream', rest)
+
+    @override_settings(STREAM_POST_LISTS=True, QUERY_DEADLINE_OPCODES=1)
+    def test_cards_read_under_query_deadline(self):
+        """Карточки, читаемые после ответа, тоже ограничены дедлайном."""
+        before = deadline_stats['posts:index']
+        clock = mock.patch('core.middleware.time.monotonic', return_value=0)
+        with clock as monotonic:
+            response = self.client.get('/')
+            monotonic.return_value = 10 ** 6
+            content = b''.join(response.streaming_content).decode()
+        self.assertNotIn('Пост ', content)
+        self.assertNotIn('</html>', content)
+        self.assertEqual(deadline_stats['posts:index'], before + 1)
@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail.models import KVStore
+
+from ..models import Post
+from ..thumbnails import RESPONSIVE_WIDTHS, prefetch_thumbnails
+from .utils import process_images_now, uploaded_gif
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmThumbnailsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Тестовый пост {i}',
+                image=uploaded_gif(f'small_{i}.gif'),
+            )
+        Post.objects.create(author=cls.user, text='Пост без картинки')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def warm(self, **options):
+        out = StringIO()
+        call_command(
+            'warm_thumbnails', processes=1, chunk_size=2, stdout=out,
+            **options
+        )
+        return out.getvalue()
+
+    def test_thumbnails_created_in_bulk(self):
+        """Команда создаёт миниатюры и записи sorl для всех картинок."""
+        output = self.warm()
+        self.assertIn('Картинок обработано: 3', output)
+        self.assertIn('создано миниатюр для: 3', output)
+        self.assertEqual(
+            KVStore.objects.filter(key__contains='||thumbnails||').count(), 3
+        )
+
+    def test_existing_thumbnails_skipped(self):
+        """Повторный запуск не пересоздаёт готовые миниатюры."""
+        self.warm()
+        output = self.warm()
+        self.assertIn('создано миниатюр для: 0', output)
+
+    def test_resume_from_state_file(self):
+        """Команда продолжает работу с pk из файла состояния."""
+        last_pk = Post.objects.exclude(image='').order_by('pk')[1].pk
+        state_file = os.path.join(TEMP_MEDIA_ROOT, 'warm_thumbnails.state')
+        with open(state_file, 'w') as state:
+            state.write(str(last_pk))
+        output = self.warm(state_file=state_file)
+        self.assertIn('Картинок обработано: 1', output)
+
+    def test_prefetch_resolves_page_in_one_query(self):
+        """Миниатюры страницы находятся одним запросом к хранилищу."""
+        self.warm()
+        cache.clear()
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            prefetch_thumbnails(posts)
+        with self.assertNumQueries(0):
+            prefetch_thumbnails(posts)
+        for post in posts:
+            with self.subTest(post=post.pk):
+                if post.image:
+                    self.assertIn('/cache/', post.thumbnail.url)
+                else:
+                    self.assertFalse(hasattr(post, 'thumbnail'))
+
+    def test_prefetch_builds_srcset_from_warmed_variants(self):
+        """Заранее созданные адаптивные варианты попадают в srcset."""
+        posts = list(Post.objects.exclude(image=''))
+        prefetch_thumbnails(posts)
+        self.assertFalse(hasattr(posts[0], 'thumbnail_srcset'))
+        self.warm()
+        prefetch_thumbnails(posts)
+        for width in RESPONSIVE_WIDTHS:
+            with self.subTest(width=width):
+                self.assertIn(f' {width}w', posts[0].thumbnail_srcset)
+
+    def test_prefetch_skips_variants_wider_than_original(self):
+        """Варианты шире оригинала не попадают в srcset."""
+        self.warm()
+        post = Post.objects.exclude(image='').first()
+        post.image_width = RESPONSIVE_WIDTHS[0]
+        prefetch_thumbnails([post])
+        self.assertEqual(len(post.thumbnail_srcset.split(', ')), 1)
+
+    def upload(self, name):
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('posts:post_create'), {
+            'text': 'Пост с новой картинкой',
+            'image': uploaded_gif(name),
+        })
+        return Post.objects.get(image=f'posts/{name}')
+
+    def test_uploaded_image_gets_variants(self):
+        """Адаптивные варианты новой картинки создаются после загрузки."""
+        with process_images_now():
+            post = self.upload('uploaded.gif')
+        # Без известной ширины srcset берёт все варианты, даже шире 2px.
+        post.image_width = None
+        prefetch_thumbnails([post])
+        for width in RESPONSIVE_WIDTHS:
+            with self.subTest(width=width):
+                self.assertIn(f' {width}w', post.thumbnail_srcset)
+
+    def test_upload_request_does_not_render_variants(self):
+        """Запрос с загрузкой только ставит картинку в очередь."""
+        executor = mock.patch('posts.images.image_executor')
+        with executor as image_executor:
+            post = self.upload('queued.gif')
+        image_executor.return_value.submit.assert_called_once_with(
+            mock.ANY, post.pk, 'posts/queued.gif'
+        )
+        self.assertFalse(
+            KVStore.objects.filter(key__contains='||thumbnails||').exists()
+        )
@@ -193,12 +193,29 @@ class PostsViewsTests(TestCase):
             text=TEST_POST_TEXT,
         )
         response_1 = self.auth_client.get(index_url)
-        test_post.delete()
+        # update() не отправляет сигналов: поколение ленты не меняется.
+        Post.objects.filter(pk=test_post.pk).update(
+            text='Другой текст', excerpt_html='<p>Другой текст</p>'
+        )
         response_2 = self.auth_client.get(index_url)
         cache.clear()
         response_3 = self.auth_client.get(index_url)
         self.assertEqual(response_1.content, response_2.content)
         self.assertNotEqual(response_2.content, response_3.content)
+        self.assertContains(response_3, 'Другой текст')
+
+    def test_posts_index_cache_invalidated_by_delete(self):
+        """Удаление поста сразу сбрасывает кэш ленты."""
+        index_url = reverse('posts:index')
+        test_post = Post.objects.create(
+            author=self.user,
+            group=self.group_1,
+            text=TEST_POST_TEXT,
+        )
+        self.auth_client.get(index_url)
+        test_post.delete()
+        response = self.auth_client.get(index_url)
+        self.assertNotIn(test_post, response.context['page_obj'])
 
 
 class PaginatorViewsTest(TestCase):
@@ -0,0 +1,212 @@
+from django.core.cache import cache, caches, InvalidCacheBackendError
+from django.db import transaction
+from PIL import features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import deserialize, serialize
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+# Миниатюра карточки поста; её же используют шаблоны.
+CARD_GEOMETRY = '960x339'
+CARD_OPTIONS = {'crop': 'center', 'upscale': True}
+
+# Адаптивные варианты карточки для srcset. WebP, если Pillow его
+# поддерживает; иначе варианты в формате карточки.
+RESPONSIVE_WIDTHS = (480, 960, 1440)
+if features.check('webp'):
+    RESPONSIVE_OPTIONS = dict(CARD_OPTIONS, format='WEBP')
+    RESPONSIVE_TYPE = 'image/webp'
+else:
+    RESPONSIVE_OPTIONS = CARD_OPTIONS
+    RESPONSIVE_TYPE = 'image/jpeg'
+
+
+def responsive_geometry(width):
+    card_width, card_height = map(int, CARD_GEOMETRY.split('x'))
+    return f'{width}x{round(width * card_height / card_width)}'
+
+
+RESPONSIVE_VARIANTS = tuple(
+    (width, responsive_geometry(width)) for width in RESPONSIVE_WIDTHS
+)
+
+# Миниатюры картинки поста: после загрузки их создаёт фоновая
+# обработка posts.images, для старых постов — команда warm_thumbnails.
+POST_THUMBNAILS = (
+    (CARD_GEOMETRY, CARD_OPTIONS),
+) + tuple(
+    (geometry, RESPONSIVE_OPTIONS) for _, geometry in RESPONSIVE_VARIANTS
+)
+
+
+def kvstore_cache():
+    try:
+        return caches[thumbnail_settings.THUMBNAIL_CACHE]
+    except InvalidCacheBackendError:
+        return cache
+
+
+def thumbnail_name(source, geometry, options):
+    """
+    Имя файла миниатюры, которое вычислил бы sorl.thumbnail
+    для тех же geometry и options, без обращения к диску.
+    """
+    backend = default.backend
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def kvstore_key(name):
+    """Ключ записи хранилища sorl для файла name."""
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def thumbnail_key(source, geometry, options):
+    """Ключ миниатюры в хранилище sorl."""
+    return kvstore_key(thumbnail_name(source, geometry, options))
+
+
+def get_kvstore_values(keys):
+    """
+    Читает записи хранилища sorl одним get_many к кэшу
+    и одним запросом к БД для промахов.
+    """
+    keys = set(keys)
+    kv_cache = kvstore_cache()
+    found = kv_cache.get_many(keys)
+    missing = keys - set(found)
+    if missing:
+        stored = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        kv_cache.set_many(stored, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        found.update(stored)
+    return {
+        key: deserialize_image_file(value)
+        for key, value in found.items()
+        if value and isinstance(value, str)
+    }
+
+
+def post_thumbnail_keys(post):
+    """Ключи карточки (ширина None) и адаптивных вариантов поста."""
+    source = ImageFile(post.image)
+    keys = [(None, thumbnail_key(source, CARD_GEOMETRY, CARD_OPTIONS))]
+    for width, geometry in RESPONSIVE_VARIANTS:
+        # Варианты шире оригинала не нужны, если размер уже известен.
+        if width <= (post.image_width or width):
+            keys.append(
+                (width, thumbnail_key(source, geometry, RESPONSIVE_OPTIONS))
+            )
+    return keys
+
+
+def prefetch_thumbnails(posts):
+    """
+    Находит миниатюры для всех постов страницы одним обращением
+    к хранилищу sorl. Карточка кладётся в post.thumbnail (отсутствующая
+    создаётся как обычно), готовые адаптивные варианты —
+    в post.thumbnail_srcset.
+    """
+    wanted = [
+        (post, post_thumbnail_keys(post)) for post in posts if post.image
+    ]
+    thumbnails = get_kvstore_values(
+        key for _, keys in wanted for _, key in keys
+    )
+    for post, keys in wanted:
+        (_, card_key), variants = keys[0], keys[1:]
+        post.thumbnail = thumbnails.get(card_key) or get_thumbnail(
+            post.image, CARD_GEOMETRY, **CARD_OPTIONS
+        )
+        srcset = [
+            f'{thumbnails[key].url} {width}w'
+            for width, key in variants if key in thumbnails
+        ]
+        if srcset:
+            post.thumbnail_srcset = ', '.join(srcset)
+            post.thumbnail_type = RESPONSIVE_TYPE
+    return posts
+
+
+def create_post_thumbnails(post):
+    """Создаёт миниатюры POST_THUMBNAILS для загруженной картинки поста."""
+    for geometry, options in POST_THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+class RecordingKVStore(KVStore):
+    """
+    Хранилище sorl для воркеров: читает из общего хранилища,
+    а записи копит в памяти, чтобы родитель сохранил их одной пачкой.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.written = {}
+
+    def _get_raw(self, key):
+        if key in self.written:
+            return self.written[key]
+        return super()._get_raw(key)
+
+    def _set_raw(self, key, value):
+        self.written[key] = value
+
+
+def render_thumbnails(names):
+    """
+    Создаёт миниатюры POST_THUMBNAILS для картинок names.
+    Возвращает записи хранилища sorl и число картинок, для которых
+    хоть одна миниатюра была создана.
+    """
+    kvstore = RecordingKVStore()
+    previous = default.kvstore._wrapped
+    default.kvstore._wrapped = kvstore
+    created = 0
+    try:
+        for name in names:
+            before = len(kvstore.written)
+            for geometry, options in POST_THUMBNAILS:
+                get_thumbnail(name, geometry, **options)
+            created += len(kvstore.written) > before
+    finally:
+        default.kvstore._wrapped = previous
+    return kvstore.written, created
+
+
+def save_kvstore_entries(entries):
+    """
+    Сохраняет записи хранилища sorl пачкой. Списки миниатюр
+    объединяются с уже сохранёнными.
+    """
+    if not entries:
+        return
+    entries = dict(entries)
+    thumbnail_keys = [key for key in entries if '||thumbnails||' in key]
+    existing = KVStoreModel.objects.filter(key__in=thumbnail_keys)
+    for key, value in existing.values_list('key', 'value'):
+        merged = set(deserialize(value)) | set(deserialize(entries[key]))
+        entries[key] = serialize(sorted(merged))
+    with transaction.atomic():
+        KVStoreModel.objects.filter(key__in=list(entries)).delete()
+        KVStoreModel.objects.bulk_create(
+            KVStoreModel(key=key, value=value)
+            for key, value in entries.items()
+        )
+    kvstore_cache().set_many(
+        entries, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+    )
@@ -0,0 +1,106 @@
+import hashlib
+import warnings
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+# Сколько первых байтов загрузки хватит, чтобы разобрать заголовок.
+HEADER_MAX_BYTES = 256 * 1024
+
+
+class StreamingImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет загрузку во временный файл по частям, попутно считая sha256
+    и разбирая только заголовок картинки. Слишком большие файлы
+    и картинки отклоняются до декодирования, остаток не записывается.
+    Причина отказа передаётся форме в атрибуте rejected файла.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.header = b''
+        self.image_format = None
+        self.image_dimensions = None
+        self.received = 0
+        self.rejected = ''
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.rejected:
+            return None
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            limit = settings.POST_IMAGE_MAX_BYTES // (1024 * 1024)
+            self.rejected = f'Файл больше {limit} МБ.'
+            return None
+        if self.image_dimensions is None:
+            self.parse_header(raw_data)
+            if self.rejected:
+                return None
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def parse_header(self, raw_data):
+        self.header += raw_data
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+                with Image.open(BytesIO(self.header)) as image:
+                    width, height = image.size
+                    self.image_format = image.format or ''
+        except Image.DecompressionBombError:
+            self.rejected = 'Слишком большое изображение.'
+            return
+        except Exception:
+            # Заголовок ещё не пришёл целиком или это не картинка.
+            if len(self.header) >= HEADER_MAX_BYTES:
+                self.rejected = (
+                    'Загрузите правильное изображение. Файл, который вы '
+                    'загрузили, поврежден или не является изображением.'
+                )
+            return
+        self.header = b''
+        self.image_dimensions = (width, height)
+        if (
+            max(width, height) > settings.POST_IMAGE_MAX_SIDE
+            or width * height > settings.POST_IMAGE_MAX_PIXELS
+        ):
+            self.rejected = (
+                f'Слишком большое изображение: {width}x{height}. '
+                f'Максимум {settings.POST_IMAGE_MAX_SIDE} точек по стороне.'
+            )
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.rejected = self.rejected
+        if not self.rejected and self.image_dimensions is None:
+            file.rejected = (
+                'Загрузите правильное изображение. Файл, который вы '
+                'загрузили, поврежден или не является изображением.'
+            )
+        file.sha256 = self.digest.hexdigest()
+        file.image_format = self.image_format
+        file.image_dimensions = self.image_dimensions
+        return file
+
+
+def image_uploads(view_func):
+    """
+    Загрузки представления проходят через StreamingImageUploadHandler.
+    Обработчик ставится до разбора тела запроса, поэтому проверка CSRF,
+    которая читает request.POST, переносится внутрь.
+    """
+    protected = csrf_protect(view_func)
+
+    @csrf_exempt
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(
+            0, StreamingImageUploadHandler(request)
+        )
+        return protected(request, *args, **kwargs)
+    return wrapper
@@ -1,40 +1,69 @@
 from django.contrib.auth.decorators import login_required
+from django.http import Http404
 from django.shortcuts import redirect, render, get_object_or_404
-from django.views.decorators.cache import cache_page
 
+from .archive import PostHistory, get_post_or_archived
+from .deletion import (is_pending, pending_ids, visible_comments,
+                       visible_posts)
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
+from .images import queue_post_image
+from .models import DeletionTask, Post, Group, User, Follow
+from .namespaces import (detail_namespaces, feed_namespaces,
+                         group_namespaces, profile_namespaces)
+from .streaming import render_post_list
+from .thumbnails import prefetch_thumbnails
+from .uploads import image_uploads
+from core.cache import cache_page_stale
+from core.middleware import query_deadline
+from core.pagecache import cache_namespaces, namespaced_key
 from core.views import page_paginator
 
 POST_ON_PAGE = 10
 POST_ON_PROFILE = 10
-CHAR_IN_POST = 200
 
 
-@cache_page(1 * 20, key_prefix='index_page')
+@cache_namespaces(feed_namespaces)
+@cache_page_stale(
+    1 * 20, 5 * 60, key_prefix='index_page', namespaces=feed_namespaces
+)
 def index(request):
-    page_obj = page_paginator(request, Post.objects.all(), POST_ON_PAGE)
+    posts = visible_posts(Post.objects.defer('text'))
+    count_key = namespaced_key(feed_namespaces(), 'post_count:feed')
+    page_obj = page_paginator(request, posts, POST_ON_PAGE, count_key)
     context = {
         'page_obj': page_obj,
-        'char_br': CHAR_IN_POST,
     }
-    return render(request, 'posts/index.html', context)
+    return render_post_list(request, 'posts/index.html', context)
 
 
+@cache_namespaces(group_namespaces)
+@query_deadline(2)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    page_obj = page_paginator(request, group.posts.all(), POST_ON_PAGE)
+    groups = Group.objects.exclude(pk__in=pending_ids(DeletionTask.GROUP))
+    group = get_object_or_404(groups, slug=slug)
+    posts = visible_posts(group.posts.defer('text'))
+    count_key = namespaced_key(
+        group_namespaces(slug), f'post_count:group:{slug}'
+    )
+    page_obj = page_paginator(request, posts, POST_ON_PAGE, count_key)
     context = {
         'group': group,
         'page_obj': page_obj,
-        'char_br': CHAR_IN_POST,
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_post_list(request, 'posts/group_list.html', context)
 
 
+@cache_namespaces(profile_namespaces)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    page_obj = page_paginator(request, author.posts.all(), POST_ON_PROFILE)
+    authors = User.objects.exclude(pk__in=pending_ids(DeletionTask.USER))
+    author = get_object_or_404(authors, username=username)
+    posts = PostHistory(
+        author.posts.defer('text'), author.archived_posts.defer('text')
+    )
+    count_key = namespaced_key(
+        profile_namespaces(username), f'post_count:author:{author.pk}'
+    )
+    page_obj = page_paginator(request, posts, POST_ON_PROFILE, count_key)
     following = False
     if request.user.is_authenticated:
         following = (Follow.objects.filter(
@@ -42,26 +71,39 @@ def profile(request, username):
     context = {
         'author': author,
         'page_obj': page_obj,
-        'char_br': CHAR_IN_POST,
         'following': following,
     }
-    return render(request, 'posts/profile.html', context)
+    return render_post_list(request, 'posts/profile.html', context)
 
 
+@cache_namespaces(detail_namespaces)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post, is_archived = get_post_or_archived(post_id)
+    if is_pending(DeletionTask.USER, post.author_id):
+        raise Http404
+    prefetch_thumbnails([post])
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
-    is_edit = True if post.author == request.user else False
+    comments = visible_comments(post.comments.all())
+    is_edit = post.author == request.user and not is_archived
+    show_group = bool(post.group_id) and not is_pending(
+        DeletionTask.GROUP, post.group_id
+    )
+    author_posts_count = (
+        post.author.posts.count() + post.author.archived_posts.count()
+    )
     context = {
         'post': post,
         'is_edit': is_edit,
+        'is_archived': is_archived,
+        'show_group': show_group,
         'form': form,
         'comments': comments,
+        'author_posts_count': author_posts_count,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@image_uploads
 @login_required
 def post_create(request):
     if request.method == 'POST':
@@ -73,6 +115,8 @@ def post_create(request):
             temp_form = form.save(commit=False)
             temp_form.author = request.user
             temp_form.save()
+            if temp_form.image:
+                queue_post_image(temp_form)
             return redirect('posts:profile', temp_form.author)
         return render(request, 'posts/create_post.html', {'form': form})
 
@@ -80,6 +124,7 @@ def post_create(request):
     return render(request, 'posts/create_post.html', {'form': form})
 
 
+@image_uploads
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -92,6 +137,8 @@ def post_edit(request, post_id):
     )
     if request.method == 'POST' and form.is_valid():
         form.save()
+        if 'image' in form.changed_data and post.image:
+            queue_post_image(post)
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -115,18 +162,21 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = visible_posts(
+        Post.objects.filter(author__following__user=request.user)
+        .defer('text')
+    )
     page_obj = page_paginator(request, posts, POST_ON_PAGE)
     context = {
         'page_obj': page_obj,
-        'char_br': CHAR_IN_POST,
     }
-    return render(request, 'posts/follow.html', context)
+    return render_post_list(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    authors = User.objects.exclude(pk__in=pending_ids(DeletionTask.USER))
+    author = get_object_or_404(authors, username=username)
     user = request.user
     if user != author:
         Follow.objects.get_or_create(
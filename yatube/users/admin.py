@@ -1,3 +1,15 @@
-# from django.contrib import admin
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
 
-# Register your models here.
+from posts.admin import QueuedDeletionMixin
+
+User = get_user_model()
+
+
+class QueuedDeletionUserAdmin(QueuedDeletionMixin, UserAdmin):
+    pass
+
+
+admin.site.unregister(User)
+admin.site.register(User, QueuedDeletionUserAdmin)
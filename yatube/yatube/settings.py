@@ -57,6 +57,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
+    'core.middleware.QueryDeadlineMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -89,23 +91,126 @@ TEMPLATES = [
     },
 ]
 
+# Горячие шаблоны постов (base.html, posts/) можно рендерить Jinja2:
+# нужен пакет jinja2. Шаблоны из каталога jinja2 тогда имеют приоритет,
+# остальные по-прежнему рендерит Django. Тестовый клиент не видит
+# контекст шаблонов Jinja2, поэтому по умолчанию выключено.
+USE_JINJA2 = False
+JINJA2_TEMPLATES = {
+    'BACKEND': 'django.template.backends.jinja2.Jinja2',
+    'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'environment': 'core.jinja2.environment',
+        'context_processors': TEMPLATES[0]['OPTIONS']['context_processors'],
+    },
+}
+# Кэш скомпилированных шаблонов Jinja2 между перезапусками. Без
+# каталога Jinja2 сама создаёт во временном каталоге личный (0700)
+# каталог пользователя; свой каталог должен принадлежать пользователю
+# процесса и быть закрыт для остальных.
+JINJA2_BYTECODE_CACHE = True
+JINJA2_BYTECODE_CACHE_DIR = None
+if USE_JINJA2:
+    TEMPLATES.insert(0, JINJA2_TEMPLATES)
+
+# Списки постов отдаются потоком: шапка страницы уходит сразу,
+# карточки — по мере чтения из базы. Такие ответы не попадают
+# в кэш страниц, поэтому по умолчанию выключено.
+STREAM_POST_LISTS = False
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Перед общим кэшем стоит LRU в памяти процесса: горячие ключи
+# читаются без обращения к общему кэшу. Чужие записи становятся
+# видны не позже чем через LOCAL_TIMEOUT секунд. В боевой среде
+# 'shared' — Memcached или Redis.
 CACHES = {
     'default': {
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 2,
+        },
+    },
+    'shared': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'LOCATION': 'shared',
+    },
 }
+# Потоки для фонового обновления страниц core.cache.cache_page_stale
+CACHE_REVALIDATE_WORKERS = 2
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Сколько секунд соединение ждёт снятия блокировки записи
+SQLITE_BUSY_TIMEOUT = 20
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+        },
     }
 }
 
+# PRAGMA, которые core.db применяет к каждому новому соединению SQLite:
+# WAL, чтобы читатели не ждали писателя, и умеренный checkpoint.
+SQLITE_PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': SQLITE_BUSY_TIMEOUT * 1000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16000,
+    'temp_store': 'MEMORY',
+    'wal_autocheckpoint': 1000,
+    'journal_size_limit': 64 * 1024 * 1024,
+}
+
+
+# Дедлайн запросов к БД для одного HTTP-запроса, в секундах.
+# Представление может задать свой через core.middleware.query_deadline.
+QUERY_DEADLINE = 5
+# Как часто (в инструкциях VM SQLite) проверять дедлайн
+QUERY_DEADLINE_OPCODES = 10000
+
+# Страницы, которые анонимным посетителям отдаются из кэша целиком.
+# Кэш сбрасывается при изменении постов, групп, комментариев
+# и пользователей (posts.signals).
+ANONYMOUS_PAGE_CACHE_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+)
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 5 * 60
+ANONYMOUS_PAGE_CACHE_ALIAS = 'default'
+
+# Прогрев процесса при запуске (core.warmup): пока он идёт,
+# /ready/ отвечает 503. С WARMUP_WAIT_FOR_CACHES готовность
+# ждёт ещё и команду warm_caches — имеет смысл с общим кэшем.
+# Отметка о прогреве привязана к RELEASE_ID, который должен
+# меняться с каждой выкладкой, иначе новые процессы сочтут
+# готовыми кэши прошлой выкладки.
+WARMUP_ON_START = True
+WARMUP_WAIT_FOR_CACHES = False
+RELEASE_ID = os.environ.get('RELEASE_ID', '')
+# Адреса процессов приложения, к которым обращается warm_caches
+WARMUP_BASE_URLS = ['http://127.0.0.1:8000']
+
+# Статическая выгрузка публичных страниц (команда export_pages).
+# Журнал PageChange позволяет перерисовывать только изменившиеся
+# страницы; без него каждая выгрузка полная. Журнал пишет строку
+# на каждое изменение и очищается только выгрузкой, поэтому включать
+# его стоит, только если export_pages запускается регулярно. Первая
+# выгрузка после включения журнала полная.
+STATIC_EXPORT_ROOT = os.path.join(BASE_DIR, 'static_export')
+STATIC_EXPORT_JOURNAL = False
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -144,6 +249,46 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# collectstatic добавляет хеш к именам и сжимает файлы заранее (gzip, brotli)
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+# Ссылки на файлы без записи в манифесте ведут на исходные имена.
+# Только для разработки: в бою без collectstatic это ошибка.
+STATICFILES_MANIFEST_FALLBACK = DEBUG
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Картинки постов и миниатюры sorl лежат в DEFAULT_FILE_STORAGE.
+# Для объектного хранилища вместо MEDIA_ROOT:
+# DEFAULT_FILE_STORAGE = 'core.storage.ObjectStorage'
+OBJECT_STORAGE = {
+    # Локально — manage.py objectstore_server
+    'ENDPOINT_URL': 'http://127.0.0.1:9000',
+    'BUCKET': 'yatube',
+    'ACCESS_KEY': os.environ.get('OBJECT_STORAGE_ACCESS_KEY', ''),
+    'SECRET_KEY': os.environ.get('OBJECT_STORAGE_SECRET_KEY', ''),
+    'REGION': 'us-east-1',
+    # Адрес, с которого браузер получает файлы (CDN или сам бакет)
+    'PUBLIC_URL': None,
+    'MULTIPART_THRESHOLD': 8 * 1024 * 1024,
+    'PART_SIZE': 8 * 1024 * 1024,
+    'MAX_WORKERS': 4,
+    # Кэш размеров и дат файлов, чтобы exists() и size() не ходили в сеть
+    'METADATA_CACHE': 'default',
+    'METADATA_TIMEOUT': 24 * 60 * 60,
+}
+# None — файлы отдаёт Django; 'X-Accel-Redirect' (nginx) или
+# 'X-Sendfile' (Apache, lighttpd) — передача файла фронтенд-серверу
+MEDIA_SENDFILE_HEADER = None
+# Внутренний location nginx, из которого отдаются файлы MEDIA_ROOT
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
+
+# Ограничения картинок постов. Формы постов принимают загрузки через
+# posts.uploads.image_uploads: файл пишется на диск по частям,
+# а картинка проверяется по заголовку.
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_SIDE = 8000
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+# Потоки, в которых после загрузки создаются миниатюры (posts.images)
+POST_IMAGE_WORKERS = 2
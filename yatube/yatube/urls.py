@@ -16,7 +16,9 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.media import serve_media, serve_static
+from core.views import cache_stats, query_deadline_stats, ready
 
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
@@ -25,11 +27,21 @@ urlpatterns = [
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
     path('admin/', admin.site.urls),
+    path('ready/', ready, name='ready'),
+    path('cache-stats/', cache_stats, name='cache_stats'),
+    path(
+        'deadline-stats/', query_deadline_stats, name='deadline_stats'
+    ),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
+    path(
+        settings.MEDIA_URL.lstrip('/') + '<path:path>',
+        serve_media,
+        name='media'
+    ),
+    path(
+        settings.STATIC_URL.lstrip('/') + '<path:path>',
+        serve_static,
+        name='static'
+    ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )